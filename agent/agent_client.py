@@ -4,8 +4,13 @@ This module provides a Python client for interacting with the agent_api Lua mod.
 """
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from enum import Enum
+from collections.abc import Sequence
+from typing import List, Optional, Dict, Any, Callable, Final, Union
 import json
+import uuid
+
+from profiling import TRACER
 
 try:
     import requests
@@ -14,7 +19,7 @@ except ImportError:
     REQUESTS_AVAILABLE = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """3D position"""
     x: float
@@ -29,7 +34,7 @@ class Position:
         return {'x': self.x, 'y': self.y, 'z': self.z}
 
 
-@dataclass
+@dataclass(slots=True)
 class Orientation:
     """Agent orientation (yaw, pitch, look direction)"""
     yaw: float
@@ -45,7 +50,7 @@ class Orientation:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Block:
     """Block information"""
     pos: Position
@@ -63,7 +68,7 @@ class Block:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Entity:
     """Entity information"""
     pos: Position
@@ -83,7 +88,7 @@ class Entity:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class LookTarget:
     """What the agent is looking at"""
     target_type: str  # 'node' or 'object'
@@ -103,7 +108,7 @@ class LookTarget:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Observation:
     """Complete agent observation"""
     position: Position
@@ -127,6 +132,135 @@ class Observation:
         )
 
 
+class LazyList(Sequence):
+    """Read-only list that builds each item from the raw payload on first access"""
+    __slots__ = ('_raw', '_factory', '_items')
+
+    def __init__(self, raw: List[Dict[str, Any]], factory: Callable[[Dict[str, Any]], Any]):
+        self._raw = raw
+        self._factory = factory
+        self._items: List[Any] = [None] * len(raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._raw)))]
+        item = self._items[index]
+        if item is None:
+            item = self._items[index] = self._factory(self._raw[index])
+        return item
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, LazyList)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LazyList({len(self._raw)} items)"
+
+
+class _Unset(Enum):
+    """Marks a lazy field that has not been parsed yet (``None`` is a valid value)"""
+    UNSET = 0
+
+
+_UNSET: Final = _Unset.UNSET
+
+
+class LazyObservation:
+    """Observation that keeps the decoded payload and parses fields on access
+
+    Exposes the same attributes as ``Observation``, so policies that only
+    read ``position`` or ``health`` never build the block and entity objects.
+    Use ``to_observation()`` when a plain dataclass is required.
+    """
+    __slots__ = ('raw', '_position', '_orientation', '_blocks', '_entities', '_look_target')
+
+    _position: Union[Position, _Unset]
+    _orientation: Union[Orientation, _Unset]
+    _blocks: Union[LazyList, _Unset]
+    _entities: Union[LazyList, _Unset]
+    _look_target: Union[LookTarget, None, _Unset]
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        Args:
+            data: Observation payload as decoded from JSON (not copied)
+        """
+        self.raw = data
+        self._position = _UNSET
+        self._orientation = _UNSET
+        self._blocks = _UNSET
+        self._entities = _UNSET
+        self._look_target = _UNSET
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LazyObservation':
+        return cls(data)
+
+    @property
+    def position(self) -> Position:
+        value = self._position
+        if value is _UNSET:
+            value = self._position = Position.from_dict(self.raw['position'])
+        return value
+
+    @property
+    def orientation(self) -> Orientation:
+        value = self._orientation
+        if value is _UNSET:
+            value = self._orientation = Orientation.from_dict(self.raw['orientation'])
+        return value
+
+    @property
+    def surrounding_blocks(self) -> LazyList:
+        value = self._blocks
+        if value is _UNSET:
+            value = self._blocks = LazyList(self.raw['surrounding_blocks'], Block.from_dict)
+        return value
+
+    @property
+    def nearby_entities(self) -> LazyList:
+        value = self._entities
+        if value is _UNSET:
+            value = self._entities = LazyList(self.raw['nearby_entities'], Entity.from_dict)
+        return value
+
+    @property
+    def look_target(self) -> Optional[LookTarget]:
+        value = self._look_target
+        if value is _UNSET:
+            value = self._look_target = LookTarget.from_dict(self.raw.get('look_target'))
+        return value
+
+    @property
+    def health(self) -> int:
+        return self.raw['health']
+
+    @property
+    def state(self) -> str:
+        return self.raw['state']
+
+    def to_observation(self) -> Observation:
+        """Materialize a regular ``Observation``"""
+        return Observation(
+            position=self.position,
+            orientation=self.orientation,
+            surrounding_blocks=list(self.surrounding_blocks),
+            nearby_entities=list(self.nearby_entities),
+            look_target=self.look_target,
+            health=self.health,
+            state=self.state
+        )
+
+    def __repr__(self) -> str:
+        return (f"LazyObservation(position={self.position!r}, health={self.health}, "
+                f"state={self.state!r}, blocks={len(self.raw['surrounding_blocks'])}, "
+                f"entities={len(self.raw['nearby_entities'])})")
+
+
 class Action:
     """Base class for agent actions"""
     
@@ -265,18 +399,391 @@ class ChatAction(Action):
         }
 
 
+class Condition:
+    """Base class for script conditions evaluated by the mod"""
+
+    def __init__(self, negate: bool = False):
+        """
+        Args:
+            negate: If True, the condition holds when the check fails
+        """
+        self.negate = negate
+
+    def _with_negate(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if self.negate:
+            result['negate'] = True
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class LookTargetCondition(Condition):
+    """Holds when the look target matches (name 'air' means no node in reach)"""
+
+    def __init__(self, name: Optional[str] = None, target_type: Optional[str] = None, negate: bool = False):
+        """
+        Args:
+            name: Node name of the look target, or 'air' when nothing is targeted
+            target_type: One of 'node', 'object', 'none'
+            negate: If True, the condition holds when the look target does not match
+        """
+        super().__init__(negate)
+        self.name = name
+        self.target_type = target_type
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'type': 'look_target'}
+        if self.name is not None:
+            result['name'] = self.name
+        if self.target_type is not None:
+            result['target_type'] = self.target_type
+        return self._with_negate(result)
+
+
+class NodeCondition(Condition):
+    """Holds when the node at a position has the given name"""
+
+    def __init__(self, pos: Position, name: str = "air", negate: bool = False):
+        """
+        Args:
+            pos: Node position
+            name: Expected node name
+            negate: If True, the condition holds when the node differs
+        """
+        super().__init__(negate)
+        self.pos = pos
+        self.name = name
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._with_negate({'type': 'node', 'pos': self.pos.to_dict(), 'name': self.name})
+
+
+class PositionCondition(Condition):
+    """Holds when the agent is within radius of a position"""
+
+    def __init__(self, pos: Position, radius: float = 0.5, negate: bool = False):
+        """
+        Args:
+            pos: Target position
+            radius: Distance within which the condition holds
+            negate: If True, the condition holds while the agent is farther away
+        """
+        super().__init__(negate)
+        self.pos = pos
+        self.radius = radius
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._with_negate({'type': 'position', 'pos': self.pos.to_dict(), 'radius': self.radius})
+
+
+def _as_node(body: Union[Action, List[Action]]) -> Action:
+    return SequenceAction(body) if isinstance(body, list) else body
+
+
+class SequenceAction(Action):
+    """Run script steps one after another"""
+
+    def __init__(self, steps: List[Action]):
+        """
+        Args:
+            steps: Actions or script nodes to run in order
+        """
+        self.steps = steps
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'type': 'sequence',
+            'steps': [step.to_dict() for step in self.steps]
+        }
+
+
+class RepeatUntilAction(Action):
+    """Repeat a script body until a condition holds
+
+    The condition is checked before every iteration, so the body does not
+    run at all if the condition already holds.
+    """
+
+    def __init__(
+        self,
+        body: Union[Action, List[Action]],
+        condition: Optional[Condition] = None,
+        max_iterations: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            body: Action, script node or list of them to repeat
+            condition: Stop once this condition holds
+            max_iterations: Stop after this many iterations
+            timeout: Stop after this many seconds
+        """
+        self.body = _as_node(body)
+        self.condition = condition
+        self.max_iterations = max_iterations
+        self.timeout = timeout
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'type': 'repeat_until', 'body': self.body.to_dict()}
+        if self.condition is not None:
+            result['condition'] = self.condition.to_dict()
+        if self.max_iterations is not None:
+            result['max_iterations'] = self.max_iterations
+        if self.timeout is not None:
+            result['timeout'] = self.timeout
+        return result
+
+
+class WaitAction(Action):
+    """Pause a script for a number of seconds"""
+
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds: Time to wait
+        """
+        self.seconds = seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'type': 'wait', 'seconds': self.seconds}
+
+
+class ScriptAction(Action):
+    """Run a multi-step script inside the mod without Python round trips
+
+    Each primitive action in the script takes one server tick, and the mod
+    limits how many script nodes an agent may visit per tick.
+    """
+
+    def __init__(
+        self,
+        body: Union[Action, List[Action]],
+        script_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            body: Action, script node or list of them to run
+            script_id: Identifier used to cancel the script (generated if omitted)
+            timeout: Abort the script after this many seconds
+        """
+        self.body = _as_node(body)
+        self.script_id = script_id or f"script_{uuid.uuid4().hex[:8]}"
+        self.timeout = timeout
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            'type': 'script',
+            'script_id': self.script_id,
+            'body': self.body.to_dict()
+        }
+        if self.timeout is not None:
+            result['timeout'] = self.timeout
+        return result
+
+
+class CancelScriptAction(Action):
+    """Cancel a running script"""
+
+    def __init__(self, script_id: Optional[str] = None):
+        """
+        Args:
+            script_id: Script to cancel; cancels all scripts if omitted
+        """
+        self.script_id = script_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'type': 'cancel_script'}
+        if self.script_id is not None:
+            result['script_id'] = self.script_id
+        return result
+
+
+class SnapshotAction(Action):
+    """Save a world region and all agent states in the mod's memory
+
+    Either pass both corners of the region, or a radius for a cube centered
+    on the agent.
+    """
+
+    def __init__(
+        self,
+        snapshot_id: str,
+        minp: Optional[Position] = None,
+        maxp: Optional[Position] = None,
+        radius: Optional[int] = None,
+    ):
+        """
+        Args:
+            snapshot_id: Name to restore the snapshot by
+            minp: One corner of the region
+            maxp: Opposite corner of the region
+            radius: Half edge of a cube around the agent (used if corners are omitted)
+        """
+        self.snapshot_id = snapshot_id
+        self.minp = minp
+        self.maxp = maxp
+        self.radius = radius
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'type': 'snapshot', 'snapshot_id': self.snapshot_id}
+        if self.minp is not None and self.maxp is not None:
+            result['minp'] = self.minp.to_dict()
+            result['maxp'] = self.maxp.to_dict()
+        if self.radius is not None:
+            result['radius'] = self.radius
+        return result
+
+
+class RestoreSnapshotAction(Action):
+    """Restore a saved region and agent states"""
+
+    def __init__(self, snapshot_id: str):
+        """
+        Args:
+            snapshot_id: Snapshot to restore
+        """
+        self.snapshot_id = snapshot_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'type': 'restore_snapshot', 'snapshot_id': self.snapshot_id}
+
+
+def condition_from_dict(data: Dict[str, Any]) -> Condition:
+    """Build a Condition from its dictionary form
+
+    Raises:
+        ValueError: If the condition type is unknown or required fields are missing
+    """
+    condition_type = data.get('type')
+    negate = bool(data.get('negate', False))
+    try:
+        if condition_type == 'look_target':
+            return LookTargetCondition(name=data.get('name'), target_type=data.get('target_type'), negate=negate)
+        if condition_type == 'node':
+            return NodeCondition(Position.from_dict(data['pos']), name=data.get('name', "air"), negate=negate)
+        if condition_type == 'position':
+            return PositionCondition(Position.from_dict(data['pos']), radius=data.get('radius', 0.5), negate=negate)
+    except KeyError as e:
+        raise ValueError(f"Condition '{condition_type}' is missing field {e}") from e
+    raise ValueError(f"Unknown condition type: {condition_type}")
+
+
+def action_from_dict(data: Dict[str, Any]) -> Action:
+    """Build an Action from its dictionary form (inverse of Action.to_dict)
+
+    Args:
+        data: Action dictionary with a 'type' key
+
+    Returns:
+        The matching Action instance
+
+    Raises:
+        ValueError: If the action type is unknown or required fields are missing
+    """
+    action_type = data.get('type')
+    try:
+        if action_type == 'move':
+            return MoveAction(data['direction'], speed=data.get('speed', 1.0))
+        if action_type == 'rotate':
+            return RotateAction(yaw_delta=data.get('yaw_delta'), pitch_delta=data.get('pitch_delta'))
+        if action_type == 'look_at':
+            return LookAtAction(yaw=data.get('yaw'), pitch=data.get('pitch'))
+        if action_type == 'dig':
+            return DigAction()
+        if action_type == 'place':
+            return PlaceAction(data.get('node_name', "default:dirt"))
+        if action_type == 'use':
+            return UseAction()
+        if action_type == 'set_observation_options':
+            options = data.get('options') or {}
+            return SetObservationOptionsAction(
+                filter_occluded_blocks=options.get('filter_occluded_blocks')
+            )
+        if action_type == 'chat':
+            return ChatAction(data['message'])
+        if action_type == 'sequence':
+            return SequenceAction([action_from_dict(step) for step in data['steps']])
+        if action_type == 'repeat_until':
+            condition = data.get('condition')
+            return RepeatUntilAction(
+                action_from_dict(data['body']),
+                condition=condition_from_dict(condition) if condition else None,
+                max_iterations=data.get('max_iterations'),
+                timeout=data.get('timeout')
+            )
+        if action_type == 'wait':
+            return WaitAction(data['seconds'])
+        if action_type == 'script':
+            return ScriptAction(
+                action_from_dict(data['body']),
+                script_id=data.get('script_id'),
+                timeout=data.get('timeout')
+            )
+        if action_type == 'cancel_script':
+            return CancelScriptAction(data.get('script_id'))
+        if action_type == 'snapshot':
+            return SnapshotAction(
+                data['snapshot_id'],
+                minp=Position.from_dict(data['minp']) if 'minp' in data else None,
+                maxp=Position.from_dict(data['maxp']) if 'maxp' in data else None,
+                radius=data.get('radius')
+            )
+        if action_type == 'restore_snapshot':
+            return RestoreSnapshotAction(data['snapshot_id'])
+    except KeyError as e:
+        raise ValueError(f"Action '{action_type}' is missing field {e}") from e
+    raise ValueError(f"Unknown action type: {action_type}")
+
+
+def _with_schedule(
+    data: Dict[str, Any], priority: Optional[str], deadline: Optional[float], flush: bool = False,
+) -> Dict[str, Any]:
+    """Add the bot server's queue scheduling keys to a serialized action"""
+    if priority is not None:
+        data['priority'] = priority
+    if deadline is not None:
+        data['deadline'] = deadline
+    if flush:
+        data['flush'] = True
+    return data
+
+
 class AgentClient:
     """Client for interacting with agent via the bot server"""
     
-    def __init__(self, server_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        server_url: str = "http://localhost:8000",
+        lazy_observations: bool = False,
+        agent_id: Optional[str] = None,
+    ):
+        """
+        Args:
+            server_url: Bot server URL
+            lazy_observations: Store received observations as ``LazyObservation``
+            agent_id: Player name of the agent, used for the shared world state
+        """
         self.server_url = server_url
-        self.last_observation: Optional[Observation] = None
+        self.lazy_observations = lazy_observations
+        self.agent_id = agent_id
+        self.last_observation: Optional[Union[Observation, LazyObservation]] = None
     
-    def send_action(self, action: Action) -> bool:
+    def send_action(
+        self,
+        action: Action,
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None,
+        flush: bool = False,
+    ) -> bool:
         """Send an action to the agent
         
         Args:
             action: Action to execute
+            priority: Queue lane: "urgent", "high", "normal" (default) or "bulk"
+            deadline: Seconds after which the server drops the action if still queued
+            flush: Drop every command still queued on the server before this one
             
         Returns:
             True if successfully queued
@@ -286,21 +793,26 @@ class AgentClient:
             return False
             
         try:
-            response = requests.post(
-                f"{self.server_url}/enqueue",
-                json=action.to_dict(),
-                timeout=1.0
-            )
+            with TRACER.span("serialize"):
+                body = json.dumps(_with_schedule(action.to_dict(), priority, deadline, flush))
+            response = self._post_json("/enqueue", body)
             return response.status_code == 200
         except Exception as e:
             print(f"Failed to send action: {e}")
             return False
     
-    def send_actions(self, actions: List[Action]) -> bool:
+    def send_actions(
+        self,
+        actions: List[Action],
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> bool:
         """Send multiple actions to the agent
         
         Args:
             actions: List of actions to execute
+            priority: Queue lane applied to every action
+            deadline: Seconds after which the server drops actions still queued
             
         Returns:
             True if successfully queued
@@ -310,17 +822,176 @@ class AgentClient:
             return False
             
         try:
-            response = requests.post(
-                f"{self.server_url}/enqueue",
-                json=[a.to_dict() for a in actions],
-                timeout=1.0
-            )
+            with TRACER.span("serialize", count=len(actions)):
+                body = json.dumps([_with_schedule(a.to_dict(), priority, deadline) for a in actions])
+            response = self._post_json("/enqueue", body)
             return response.status_code == 200
         except Exception as e:
             print(f"Failed to send actions: {e}")
             return False
     
-    def get_observation(self) -> Optional[Observation]:
+    def _request(self, method: str, path: str, timeout: float = 1.0, **kwargs) -> 'requests.Response':
+        return requests.request(method, f"{self.server_url}{path}", timeout=timeout, **kwargs)
+
+    def _post_json(self, path: str, body: str) -> 'requests.Response':
+        with TRACER.span("http_send", path=path):
+            return self._request("POST", path, data=body, headers={'Content-Type': 'application/json'})
+    
+    def flush_trace(self) -> bool:
+        """Send this process's recorded spans to the bot server
+
+        The server merges them with its own and the mod's spans, so
+        ``fetch_trace`` returns one timeline for the whole control loop.
+
+        Returns:
+            True if the spans were accepted (they are dropped locally either way)
+        """
+        if not REQUESTS_AVAILABLE:
+            print("requests module not available. Install with: pip install requests")
+            return False
+
+        payload = TRACER.drain_payload()
+        if not payload['spans']:
+            return True
+        try:
+            response = self._request("POST", "/trace", timeout=5.0, json=payload)
+            return response.status_code == 200
+        except Exception as e:
+            print(f"Failed to send trace: {e}")
+            return False
+
+    def fetch_trace(self, format: str = "chrome") -> Optional[Union[Dict[str, Any], str]]:
+        """Download the merged trace from the bot server
+
+        Args:
+            format: "chrome" (trace event JSON), "folded" (flamegraph input) or "summary"
+
+        Returns:
+            Parsed JSON, folded text, or None on failure
+        """
+        if not REQUESTS_AVAILABLE:
+            print("requests module not available. Install with: pip install requests")
+            return None
+
+        try:
+            response = self._request("GET", "/trace", timeout=5.0, params={'format': format})
+            if response.status_code != 200:
+                return None
+            return response.text if format == "folded" else response.json()
+        except Exception as e:
+            print(f"Failed to fetch trace: {e}")
+            return None
+    
+    def snapshot(
+        self,
+        snapshot_id: str,
+        minp: Optional[Position] = None,
+        maxp: Optional[Position] = None,
+        radius: Optional[int] = None,
+    ) -> bool:
+        """Save a world region and all agent states for a later reset
+
+        Args:
+            snapshot_id: Name to restore the snapshot by
+            minp: One corner of the region
+            maxp: Opposite corner of the region
+            radius: Half edge of a cube around the agent (used if corners are omitted)
+
+        Returns:
+            True if successfully queued
+        """
+        return self.send_action(SnapshotAction(snapshot_id, minp=minp, maxp=maxp, radius=radius))
+
+    def reset(self, snapshot_id: str) -> bool:
+        """Reset the world region and agents to a snapshot (episode reset)
+
+        The restore is sent as urgent and flushes every command still queued
+        on the server, so no action from the old episode runs after it.
+        Clears the cached observation, since it describes the old episode.
+
+        Args:
+            snapshot_id: Snapshot to restore
+
+        Returns:
+            True if successfully queued
+        """
+        if not self.send_action(RestoreSnapshotAction(snapshot_id), priority="urgent", flush=True):
+            return False
+        self.last_observation = None
+        return True
+
+    def _world_request(self, method: str, path: str, **kwargs) -> Optional[Dict[str, Any]]:
+        if not REQUESTS_AVAILABLE:
+            print("requests module not available. Install with: pip install requests")
+            return None
+
+        try:
+            response = self._request(method, f"/world/{path}", **kwargs)
+            if response.status_code != 200:
+                print(f"World state request failed: {response.status_code} {response.text}")
+                return None
+            return response.json()
+        except Exception as e:
+            print(f"World state request failed: {e}")
+            return None
+
+    def publish_observation(self, obs_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge an observation into the bot server's shared world state
+
+        The mod does this itself when ``agent_api.share_observations`` is on.
+
+        Args:
+            obs_data: Observation data dictionary
+
+        Returns:
+            ``{'version': ..., 'changed': ...}`` or None on failure
+        """
+        if self.agent_id is None:
+            print("publish_observation requires agent_id")
+            return None
+        return self._world_request("POST", "observe", json={'agent_id': self.agent_id, 'observation': obs_data})
+
+    def subscribe_region(self, minp: Position, maxp: Position, since: int = 0) -> Optional[str]:
+        """Follow a region of the shared world state
+
+        Args:
+            minp: One corner of the region
+            maxp: Opposite corner of the region
+            since: The first ``world_changes`` call returns changes after this version
+
+        Returns:
+            Subscription id or None on failure
+        """
+        if self.agent_id is None:
+            print("subscribe_region requires agent_id")
+            return None
+        result = self._world_request("POST", "subscribe", json={
+            'agent_id': self.agent_id,
+            'minp': minp.to_dict(),
+            'maxp': maxp.to_dict(),
+            'since': since,
+        })
+        return result['subscription_id'] if result else None
+
+    def unsubscribe_region(self, subscription_id: str) -> bool:
+        """Stop following a region"""
+        return self._world_request("POST", "unsubscribe", json={'subscription_id': subscription_id}) is not None
+
+    def world_changes(self, subscription_id: Optional[str] = None, since: int = 0) -> Optional[Dict[str, Any]]:
+        """Get changes from the shared world state
+
+        Args:
+            subscription_id: Return changes in this subscription's region since its previous call
+            since: Without a subscription, return changes anywhere after this version
+
+        Returns:
+            ``version``, ``blocks``, ``entities`` and ``removed_entities``, or None on failure
+        """
+        if subscription_id is not None:
+            return self._world_request("GET", "changes", params={'subscription_id': subscription_id})
+        return self._world_request("GET", "changes", params={'since': since})
+
+    def get_observation(self) -> Optional[Union[Observation, LazyObservation]]:
         """Get the latest observation from the agent
         
         Note: Observation pushing from Lua to Python is not yet implemented.
@@ -344,4 +1015,7 @@ class AgentClient:
         Args:
             obs_data: Observation data dictionary
         """
-        self.last_observation = Observation.from_dict(obs_data)
+        if self.lazy_observations:
+            self.last_observation = LazyObservation(obs_data)
+        else:
+            self.last_observation = Observation.from_dict(obs_data)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Benchmark observation parsing for a multi-agent step
+
+Parses one radius-2 observation per agent the way a control loop would:
+eagerly into dataclasses, lazily while reading only the position, and into
+a single structure-of-arrays batch. Reports time and peak allocated memory
+per step.
+
+Usage:
+    uv run python bench_observation_parse.py [agents] [iterations]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from agent_client import LazyObservation, Observation
+from bench_observation_text import make_observation
+from observation_batch import ObservationBatch
+
+
+def measure(func, iterations: int):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    ms = (time.perf_counter() - start) / iterations * 1e3
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ms, peak
+
+
+def main():
+    agents = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    raws = [make_observation(random.Random(i), i, 0) for i in range(agents)]
+
+    cases = [
+        ("eager", lambda: [Observation.from_dict(r) for r in raws]),
+        ("lazy position", lambda: [LazyObservation(r).position for r in raws]),
+        ("lazy all blocks", lambda: [list(LazyObservation(r).surrounding_blocks) for r in raws]),
+        ("batch arrays", lambda: ObservationBatch.from_dicts(raws)),
+    ]
+
+    print(f"{agents} agents x {len(raws[0]['surrounding_blocks'])} blocks, {iterations} iterations")
+    print(f"{'parser':<18}{'ms/step':>10}{'peak KiB':>10}")
+    for name, func in cases:
+        ms, peak = measure(func, iterations)
+        print(f"{name:<18}{ms:>10.2f}{peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Benchmark compact observation rendering against raw JSON
+
+Compares prompt size and render time of a radius-2 observation (125 blocks)
+as raw JSON, as a full compact frame, and as incremental deltas along a
+short random walk.
+
+Usage:
+    uv run python bench_observation_text.py [iterations]
+"""
+
+import json
+import random
+import sys
+import time
+from dataclasses import asdict
+
+from agent_client import Observation
+from observation_text import IncrementalRenderer, render_observation
+
+try:
+    import tiktoken
+    ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    ENCODING = None
+
+NODES_BELOW = ['default:stone', 'default:stone', 'default:dirt', 'default:gravel', 'default:stone_with_coal']
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when available, otherwise estimate at 4 chars/token"""
+    if ENCODING is not None:
+        return len(ENCODING.encode(text))
+    return max(1, len(text) // 4)
+
+
+def make_observation(rng: random.Random, x: int, z: int, radius: int = 2) -> dict:
+    """Build a raw observation shaped like agent_api.observe output"""
+    blocks = []
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            for dz in range(-radius, radius + 1):
+                if dy < -1:
+                    name = rng.choice(NODES_BELOW)
+                elif dy == -1:
+                    name = 'default:dirt_with_grass'
+                else:
+                    name = 'default:tree' if (x + dx, z + dz) == (3, 3) else 'air'
+                blocks.append({
+                    'pos': {'x': x + dx, 'y': 8 + dy, 'z': z + dz},
+                    'name': name,
+                    'param1': rng.randint(0, 15) if name == 'air' else 0,
+                    'param2': 0,
+                })
+    return {
+        'position': {'x': x + 0.31, 'y': 8.0, 'z': z - 0.12},
+        'orientation': {'yaw': 1.5707963, 'pitch': -0.2, 'look_dir': {'x': -0.98, 'y': -0.19, 'z': 0.0}},
+        'surrounding_blocks': blocks,
+        'nearby_entities': [
+            {'pos': {'x': x + 4.2, 'y': 8.0, 'z': z + 1.5}, 'distance': 4.46, 'name': 'alice', 'type': 'player', 'player_name': 'alice'},
+            {'pos': {'x': x - 2.0, 'y': 8.5, 'z': z + 0.5}, 'distance': 2.12, 'name': 'agent_api:living_agent', 'type': 'entity'},
+            {'pos': {'x': x + 7.1, 'y': 9.0, 'z': z - 3.3}, 'distance': 7.89, 'name': '__builtin:item', 'type': 'entity'},
+        ],
+        'look_target': {'type': 'node', 'pos': {'x': x - 1, 'y': 7, 'z': z}, 'name': 'default:dirt_with_grass', 'distance': 1.6},
+        'health': 20,
+        'state': 'idle',
+    }
+
+
+def time_per_call(func, arg, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(0)
+
+    raw = make_observation(rng, 0, 0)
+    obs = Observation.from_dict(raw)
+    raw_json = json.dumps(raw)
+    compact_json = json.dumps(asdict(obs), separators=(',', ':'))
+    text = render_observation(obs)
+
+    # Random walk: mostly standing still or turning, occasionally stepping
+    walk = []
+    x = z = 0
+    walk_rng = random.Random(1)
+    for step in range(200):
+        if walk_rng.random() < 0.15:
+            x += walk_rng.choice([-1, 1])
+        raw_step = make_observation(random.Random(x * 1000 + z), x, z)
+        raw_step['orientation']['yaw'] = round(walk_rng.uniform(0, 6.28), 2)
+        walk.append(Observation.from_dict(raw_step))
+
+    renderer = IncrementalRenderer()
+    walk_text = [renderer.render(o) for o in walk]
+    walk_json = [json.dumps(asdict(o), separators=(',', ':')) for o in walk]
+
+    rows = [
+        ("raw JSON", len(raw_json), count_tokens(raw_json), time_per_call(json.dumps, raw, iterations)),
+        ("compact JSON", len(compact_json), count_tokens(compact_json),
+         time_per_call(lambda o: json.dumps(asdict(o), separators=(',', ':')), obs, iterations)),
+        ("text frame", len(text), count_tokens(text), time_per_call(render_observation, obs, iterations)),
+    ]
+
+    print(f"Single radius-2 observation ({len(raw['surrounding_blocks'])} blocks), {iterations} iterations")
+    print(f"{'format':<14}{'chars':>8}{'tokens':>8}{'ratio':>8}{'µs/render':>12}")
+    for name, chars, tokens, us in rows:
+        print(f"{name:<14}{chars:>8}{tokens:>8}{rows[0][2] / tokens:>7.1f}x{us:>12.1f}")
+
+    json_tokens = sum(count_tokens(t) for t in walk_json)
+    text_tokens = sum(count_tokens(t) for t in walk_text)
+    replay = IncrementalRenderer()
+    start = time.perf_counter()
+    for o in walk:
+        replay.render(o)
+    us = (time.perf_counter() - start) / len(walk) * 1e6
+    print()
+    print(f"Incremental over a {len(walk)}-step walk")
+    print(f"  JSON tokens:        {json_tokens}")
+    print(f"  incremental tokens: {text_tokens} ({json_tokens / text_tokens:.1f}x fewer)")
+    print(f"  render time:        {us:.1f} µs/step")
+    print(f"  tokenizer:          {'tiktoken o200k_base' if ENCODING else 'estimate (4 chars/token)'}")
+
+
+if __name__ == "__main__":
+    main()
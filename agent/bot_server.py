@@ -1,39 +1,75 @@
 #!/usr/bin/env python3
 import json
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from queue import SimpleQueue
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
-QUEUE = SimpleQueue()
+from command_queue import CommandQueue, parse_limit
+from living_brain import decide_batch
+from profiling import Tracer, env_sample_rate
+from world_state import WorldState
+
+# Own tracer, so importing a server does not relabel the process-wide profiling.TRACER
+TRACER = Tracer(process="bot_server", sample_rate=env_sample_rate())
+QUEUE = CommandQueue(tracer=TRACER)
+WORLD = WorldState()
 
 
 class Handler(BaseHTTPRequestHandler):
     def _send_json(self, status, payload):
-        body = json.dumps(payload).encode("utf-8")
+        self._send_body(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send_body(self, status, body, content_type):
         self.send_response(status)
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Type", content_type)
         self.send_header("Content-Length", str(len(body)))
         self.end_headers()
         self.wfile.write(body)
 
     def do_GET(self):
-        path = urlparse(self.path).path
+        url = urlparse(self.path)
+        path = url.path
         if path == "/health":
             self._send_json(200, {"ok": True})
             return
 
+        if path == "/trace":
+            fmt = parse_qs(url.query).get("format", ["chrome"])[0]
+            if fmt == "folded":
+                self._send_body(200, TRACER.to_folded().encode("utf-8"), "text/plain")
+            elif fmt == "summary":
+                self._send_json(200, TRACER.summary())
+            else:
+                self._send_json(200, TRACER.to_chrome_trace())
+            return
+
+        if path == "/world/changes":
+            query = parse_qs(url.query)
+            subscription_id = query.get("subscription_id", [None])[0]
+            if subscription_id is not None:
+                try:
+                    self._send_json(200, WORLD.poll(subscription_id))
+                except KeyError:
+                    self._send_json(404, {"error": "unknown subscription"})
+                return
+            try:
+                since = int(query.get("since", ["0"])[0])
+            except ValueError:
+                self._send_json(400, {"error": "invalid since"})
+                return
+            self._send_json(200, WORLD.changes(since))
+            return
+
         if path != "/next":
             self._send_json(404, {"error": "not found"})
             return
 
-        commands = []
-        while not QUEUE.empty():
-            commands.append(QUEUE.get())
-        self._send_json(200, {"commands": commands})
+        limit = parse_limit(parse_qs(url.query).get("limit", [None])[0])
+        self._send_json(200, {"commands": QUEUE.pop_batch(limit)})
 
     def do_POST(self):
         path = urlparse(self.path).path
-        if path != "/enqueue":
+        if path not in ("/enqueue", "/living/decide", "/trace", "/world/observe", "/world/subscribe",
+                        "/world/unsubscribe"):
             self._send_json(404, {"error": "not found"})
             return
 
@@ -49,11 +85,80 @@ class Handler(BaseHTTPRequestHandler):
             self._send_json(400, {"error": "missing payload"})
             return
 
+        if path == "/trace":
+            try:
+                received = TRACER.ingest(payload)
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(200, {"received": received})
+            return
+
+        if path.startswith("/world/"):
+            self._world_post(path, payload)
+            return
+
+        if path == "/living/decide":
+            agents = payload.get("agents") if isinstance(payload, dict) else None
+            if not isinstance(agents, list):
+                self._send_json(400, {"error": "missing agents"})
+                return
+            try:
+                decisions = decide_batch(agents)
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(200, {"decisions": decisions})
+            return
+
         commands = payload if isinstance(payload, list) else [payload]
-        for cmd in commands:
-            QUEUE.put(cmd)
+        try:
+            queued = QUEUE.put_many(commands)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        self._send_json(200, {"queued": queued})
+
+    def _world_post(self, path, payload):
+        if not isinstance(payload, dict):
+            self._send_json(400, {"error": "expected object"})
+            return
+
+        if path == "/world/unsubscribe":
+            if not WORLD.unsubscribe(str(payload.get("subscription_id"))):
+                self._send_json(404, {"error": "unknown subscription"})
+                return
+            self._send_json(200, {"ok": True})
+            return
 
-        self._send_json(200, {"queued": len(commands)})
+        agent_id = payload.get("agent_id")
+        if not isinstance(agent_id, str):
+            self._send_json(400, {"error": "missing agent_id"})
+            return
+        try:
+            if path == "/world/observe":
+                observation = payload.get("observation")
+                if not isinstance(observation, dict):
+                    self._send_json(400, {"error": "missing observation"})
+                    return
+                self._send_json(200, WORLD.observe(agent_id, observation))
+            else:
+                minp, maxp = payload.get("minp"), payload.get("maxp")
+                if not isinstance(minp, dict) or not isinstance(maxp, dict):
+                    self._send_json(400, {"error": "missing region"})
+                    return
+                subscription_id = WORLD.subscribe(agent_id, minp, maxp, payload.get("since", 0))
+                self._send_json(200, {"subscription_id": subscription_id, "version": WORLD.version})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+
+    def do_DELETE(self):
+        if urlparse(self.path).path != "/trace":
+            self._send_json(404, {"error": "not found"})
+            return
+        TRACER.clear()
+        self._send_json(200, {"ok": True})
 
     def log_message(self, format, *args):
         return
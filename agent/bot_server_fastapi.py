@@ -1,12 +1,20 @@
 from __future__ import annotations
 
-from queue import SimpleQueue
 from typing import Any
 
 from fastapi import Body, FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 
+from command_queue import CommandQueue, parse_limit
+from living_brain import decide_batch
+from profiling import Tracer, env_sample_rate
+from world_state import WorldState
+
+# Own tracer, so importing a server does not relabel the process-wide profiling.TRACER
+TRACER = Tracer(process="bot_server", sample_rate=env_sample_rate())
 app = FastAPI()
-QUEUE: SimpleQueue[Any] = SimpleQueue()
+QUEUE = CommandQueue(tracer=TRACER)
+WORLD = WorldState()
 
 
 @app.get("/health")
@@ -15,11 +23,8 @@ def health() -> dict[str, bool]:
 
 
 @app.get("/next")
-def next_commands() -> dict[str, list[Any]]:
-    commands: list[Any] = []
-    while not QUEUE.empty():
-        commands.append(QUEUE.get())
-    return {"commands": commands}
+def next_commands(limit: str | None = None) -> dict[str, list[Any]]:
+    return {"commands": QUEUE.pop_batch(parse_limit(limit))}
 
 
 @app.post("/enqueue")
@@ -28,7 +33,99 @@ def enqueue(payload: Any = Body(...)) -> dict[str, int]:
         raise HTTPException(status_code=400, detail="missing payload")
 
     commands = payload if isinstance(payload, list) else [payload]
-    for command in commands:
-        QUEUE.put(command)
+    try:
+        queued = QUEUE.put_many(commands)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return {"queued": queued}
+
+
+@app.post("/living/decide")
+def living_decide(payload: Any = Body(...)) -> dict[str, dict[str, str]]:
+    agents = payload.get("agents") if isinstance(payload, dict) else None
+    if not isinstance(agents, list):
+        raise HTTPException(status_code=400, detail="missing agents")
+
+    try:
+        decisions = decide_batch(agents)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return {"decisions": decisions}
+
+
+@app.post("/trace")
+def trace_ingest(payload: Any = Body(...)) -> dict[str, int]:
+    try:
+        received = TRACER.ingest(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return {"received": received}
+
+
+@app.get("/trace")
+def trace_export(format: str = "chrome") -> Any:
+    if format == "folded":
+        return PlainTextResponse(TRACER.to_folded())
+    if format == "summary":
+        return TRACER.summary()
+    return TRACER.to_chrome_trace()
+
+
+@app.delete("/trace")
+def trace_clear() -> dict[str, bool]:
+    TRACER.clear()
+    return {"ok": True}
+
+
+def _agent_id(payload: Any) -> str:
+    agent_id = payload.get("agent_id") if isinstance(payload, dict) else None
+    if not isinstance(agent_id, str):
+        raise HTTPException(status_code=400, detail="missing agent_id")
+    return agent_id
+
+
+@app.post("/world/observe")
+def world_observe(payload: Any = Body(...)) -> dict[str, int]:
+    agent_id = _agent_id(payload)
+    observation = payload.get("observation")
+    if not isinstance(observation, dict):
+        raise HTTPException(status_code=400, detail="missing observation")
+    try:
+        return WORLD.observe(agent_id, observation)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@app.post("/world/subscribe")
+def world_subscribe(payload: Any = Body(...)) -> dict[str, Any]:
+    agent_id = _agent_id(payload)
+    minp, maxp = payload.get("minp"), payload.get("maxp")
+    if not isinstance(minp, dict) or not isinstance(maxp, dict):
+        raise HTTPException(status_code=400, detail="missing region")
+    try:
+        subscription_id = WORLD.subscribe(agent_id, minp, maxp, payload.get("since", 0))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return {"subscription_id": subscription_id, "version": WORLD.version}
+
+
+@app.post("/world/unsubscribe")
+def world_unsubscribe(payload: Any = Body(...)) -> dict[str, bool]:
+    subscription_id = payload.get("subscription_id") if isinstance(payload, dict) else None
+    if not WORLD.unsubscribe(str(subscription_id)):
+        raise HTTPException(status_code=404, detail="unknown subscription")
+
+    return {"ok": True}
+
 
-    return {"queued": len(commands)}
+@app.get("/world/changes")
+def world_changes(subscription_id: str | None = None, since: int = 0) -> dict[str, Any]:
+    if subscription_id is None:
+        return WORLD.changes(since)
+    try:
+        return WORLD.poll(subscription_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail="unknown subscription") from e
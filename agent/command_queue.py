@@ -0,0 +1,150 @@
+"""Priority command queue shared by the bot servers
+
+Commands posted to ``/enqueue`` may carry two optional scheduling keys that
+are stripped before delivery to the mod:
+
+- ``priority``: one of ``urgent``, ``high``, ``normal`` (default) or ``bulk``
+- ``deadline``: seconds after enqueueing during which the command is still
+  worth executing; expired commands are dropped instead of delivered
+- ``flush``: when true, every command still queued (in any lane) is dropped
+  before this one is queued, e.g. so an episode reset is not followed by
+  leftover actions from the previous episode
+
+``/next`` drains the lanes from most to least urgent, FIFO within a lane,
+and delivers at most ``limit`` commands per poll so a long backlog cannot
+stall a single server tick.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from profiling import Tracer, now_us
+
+URGENT = "urgent"
+HIGH = "high"
+NORMAL = "normal"
+BULK = "bulk"
+
+PRIORITIES = (URGENT, HIGH, NORMAL, BULK)
+SCHEDULE_KEYS = ('priority', 'deadline', 'flush')
+
+DEFAULT_MAX_PER_POLL = 32
+
+
+class CommandQueue:
+    """Thread-safe multi-lane command queue with per-command deadlines"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, tracer: Optional[Tracer] = None):
+        """
+        Args:
+            clock: Monotonic time source in seconds (overridable for tests)
+            tracer: Records a ``time_queued`` span per delivered command when enabled
+        """
+        self._clock = clock
+        self._tracer = tracer
+        self._lock = threading.Lock()
+        self._lanes: Dict[str, Deque[Tuple[Optional[float], Any, int]]] = {p: deque() for p in PRIORITIES}
+        self.expired = 0
+        self.flushed = 0
+
+    def _entry(self, command: Any) -> Tuple[str, bool, Tuple[Optional[float], Any]]:
+        if not isinstance(command, dict) or not any(key in command for key in SCHEDULE_KEYS):
+            return NORMAL, False, (None, command)
+
+        command = dict(command)
+        priority = command.pop('priority', None) or NORMAL
+        deadline = command.pop('deadline', None)
+        flush = command.pop('flush', False)
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if not isinstance(flush, bool):
+            raise ValueError(f"Invalid flush: {flush!r}")
+        if deadline is None:
+            return priority, flush, (None, command)
+        if isinstance(deadline, bool) or not isinstance(deadline, (int, float)):
+            raise ValueError(f"Invalid deadline: {deadline!r}")
+        return priority, flush, (self._clock() + deadline, command)
+
+    def put(self, command: Any) -> None:
+        """Queue a command
+
+        Raises:
+            ValueError: If the priority is unknown, or the deadline or flush flag is invalid
+        """
+        self.put_many([command])
+
+    def put_many(self, commands: List[Any]) -> int:
+        """Queue several commands; nothing is queued if any of them is invalid
+
+        Returns:
+            Number of commands queued
+
+        Raises:
+            ValueError: If a priority is unknown, or a deadline or flush flag is invalid
+        """
+        entries = [self._entry(command) for command in commands]
+        enqueued_us = now_us()
+        with self._lock:
+            for priority, flush, (expires_at, command) in entries:
+                if flush:
+                    self._clear()
+                self._lanes[priority].append((expires_at, command, enqueued_us))
+        return len(entries)
+
+    def pop_batch(self, limit: int = DEFAULT_MAX_PER_POLL) -> List[Any]:
+        """Take up to ``limit`` unexpired commands, most urgent first"""
+        now = self._clock()
+        batch: List[Any] = []
+        queued: List[Tuple[str, Any, int]] = []
+        with self._lock:
+            for priority in PRIORITIES:
+                lane = self._lanes[priority]
+                while lane and len(batch) < limit:
+                    expires_at, command, enqueued_us = lane.popleft()
+                    if expires_at is not None and expires_at < now:
+                        self.expired += 1
+                        continue
+                    batch.append(command)
+                    queued.append((priority, command, enqueued_us))
+
+        tracer = self._tracer
+        if tracer is not None and tracer.enabled and queued:
+            delivered_us = now_us()
+            for priority, command, enqueued_us in queued:
+                if tracer.sample():
+                    action_type = command.get('type') if isinstance(command, dict) else None
+                    tracer.record('time_queued', enqueued_us, delivered_us - enqueued_us,
+                                  thread=priority, type=action_type)
+        return batch
+
+    def _clear(self) -> None:
+        """Drop every queued command; the caller holds the lock"""
+        for lane in self._lanes.values():
+            self.flushed += len(lane)
+            lane.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(lane) for lane in self._lanes.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Queued commands per lane plus the number dropped by deadlines and flushes"""
+        with self._lock:
+            result = {priority: len(lane) for priority, lane in self._lanes.items()}
+            result['expired'] = self.expired
+            result['flushed'] = self.flushed
+        return result
+
+
+def parse_limit(value: Optional[str], default: int = DEFAULT_MAX_PER_POLL) -> int:
+    """Parse the ``limit`` query parameter of ``/next``
+
+    Falls back to ``default`` when missing or invalid and never exceeds it.
+    """
+    try:
+        limit = int(value) if value is not None else default
+    except ValueError:
+        return default
+    return max(1, min(limit, default))
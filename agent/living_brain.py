@@ -0,0 +1,113 @@
+"""Batched decisions for living agents (demo NPCs)
+
+With ``agent_api.living_brain = python`` the mod sends the state of every
+living agent to the bot server in one request per interval. ``decide_batch``
+picks a behavior for all of them in a single vectorized NumPy pass; the mod
+falls back to its Lua rules whenever a reply is late.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+WANDER = "wander"
+FOLLOW = "follow"
+AVOID = "avoid"
+REST = "rest"
+IDLE = "idle"
+
+BEHAVIORS = (WANDER, FOLLOW, AVOID, REST, IDLE)
+
+
+@dataclass
+class LivingBrain:
+    """Vectorized version of the mod's default living agent rules
+
+    Rules are checked in priority order: REST, AVOID, FOLLOW, WANDER, IDLE.
+    Unlike the Lua rules, a resting agent keeps resting until its fatigue
+    drops below ``rest_until_fatigue`` instead of flipping back as soon as
+    it dips under ``rest_fatigue``.
+    """
+    rest_fatigue: float = 85.0
+    rest_until_fatigue: Optional[float] = 50.0
+    avoid_radius: float = 3.0
+    follow_radius: float = 8.0
+    wander_hunger: float = 60.0
+    wander_max_fatigue: float = 60.0
+
+    def decide(
+        self,
+        hunger: np.ndarray,
+        fatigue: np.ndarray,
+        focus_distance: np.ndarray,
+        threat_distance: np.ndarray,
+        resting: np.ndarray,
+    ) -> np.ndarray:
+        """Pick a behavior per agent
+
+        Args:
+            hunger: Hunger per agent (0-100)
+            fatigue: Fatigue per agent (0-100)
+            focus_distance: Distance to the nearest player to follow (NaN if none)
+            threat_distance: Distance to the nearest player to avoid (NaN if none)
+            resting: Whether each agent is currently resting
+
+        Returns:
+            Array of behavior names
+        """
+        rest = fatigue > self.rest_fatigue
+        if self.rest_until_fatigue is not None:
+            rest |= resting & (fatigue > self.rest_until_fatigue)
+
+        # NaN distances compare False, so agents without a player never match
+        with np.errstate(invalid='ignore'):
+            avoid = threat_distance < self.avoid_radius
+            follow = focus_distance < self.follow_radius
+        wander = (hunger > self.wander_hunger) & (fatigue < self.wander_max_fatigue)
+
+        return np.select(
+            [rest, avoid, follow, wander],
+            [REST, AVOID, FOLLOW, WANDER],
+            default=IDLE,
+        )
+
+
+DEFAULT_BRAIN = LivingBrain()
+
+
+def _column(agents: List[Dict[str, Any]], key: str) -> np.ndarray:
+    values = [agent.get(key) for agent in agents]
+    for v in values:
+        if v is not None and (isinstance(v, bool) or not isinstance(v, (int, float))):
+            raise ValueError(f"invalid {key}: {v!r}")
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def decide_batch(agents: Sequence[Any], brain: LivingBrain = DEFAULT_BRAIN) -> Dict[str, str]:
+    """Decide behaviors for a batch of living agents
+
+    Args:
+        agents: Agent states as sent by the mod, each with 'id', 'hunger',
+            'fatigue', 'behavior' and optional 'focus_distance' / 'threat_distance';
+            entries that are not objects with an 'id' are skipped
+        brain: Policy to apply
+
+    Returns:
+        Mapping of agent id to behavior name
+
+    Raises:
+        ValueError: If a numeric field is not a number
+    """
+    agents = [a for a in agents if isinstance(a, dict) and 'id' in a]
+    if not agents:
+        return {}
+
+    behaviors = brain.decide(
+        hunger=np.nan_to_num(_column(agents, 'hunger')),
+        fatigue=np.nan_to_num(_column(agents, 'fatigue')),
+        focus_distance=_column(agents, 'focus_distance'),
+        threat_distance=_column(agents, 'threat_distance'),
+        resting=np.array([a.get('behavior') == REST for a in agents], dtype=bool),
+    )
+    return {str(a['id']): str(b) for a, b in zip(agents, behaviors)}
@@ -0,0 +1,331 @@
+"""Batched asynchronous LLM policy runner
+
+This module turns agent observations into model prompts and decides actions
+for many agents at once. Model calls run concurrently under a bounded
+semaphore, decisions are cached by a canonical hash of the observation, and
+each agent keeps a short speculative plan so it always has an action to take
+while a fresh decision is being computed.
+"""
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict, deque
+from dataclasses import asdict
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from agent_client import Action, LazyObservation, Observation, action_from_dict
+from observation_text import FORMAT_PREAMBLE, render_observation
+from profiling import TRACER
+
+try:
+    from openai import AsyncOpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    AsyncOpenAI = None
+    OPENAI_AVAILABLE = False
+
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+DEFAULT_SYSTEM_PROMPT = """You control an agent in a Luanti (Minetest) world.
+You receive the agent's current observation and reply with a JSON object of the form
+{"actions": [<action>, ...]} listing the next actions to take, most urgent first.
+Each action is one of:
+  {"type": "move", "direction": "forward|backward|left|right|up|down", "speed": 1.0}
+  {"type": "rotate", "yaw_delta": 0.0, "pitch_delta": 0.0}
+  {"type": "look_at", "yaw": 0.0, "pitch": 0.0}
+  {"type": "dig"}
+  {"type": "place", "node_name": "default:dirt"}
+  {"type": "use"}
+  {"type": "chat", "message": "..."}
+Reply with JSON only.
+
+""" + FORMAT_PREAMBLE
+
+
+def _canonicalize(value: Any, precision: int) -> Any:
+    """Round floats and order unordered collections so equal states hash equally"""
+    if isinstance(value, float):
+        return round(value, precision)
+    if isinstance(value, dict):
+        return {k: _canonicalize(v, precision) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(v, precision) for v in value]
+    return value
+
+
+def _as_dict(obs: Observation) -> Dict[str, Any]:
+    if isinstance(obs, LazyObservation):
+        obs = obs.to_observation()
+    return asdict(obs)
+
+
+def observation_key(obs: Observation, precision: int = 1) -> str:
+    """Return a canonical hash of an observation
+
+    Floats are rounded to ``precision`` decimals and nearby entities are
+    sorted, so observations that differ only by float noise or by the order
+    the engine returned objects in share the same key.
+
+    Args:
+        obs: Observation to hash
+        precision: Number of decimals kept for float values
+
+    Returns:
+        Hex digest identifying the observation
+    """
+    data = _canonicalize(_as_dict(obs), precision)
+    data['nearby_entities'] = sorted(
+        data['nearby_entities'],
+        key=lambda e: json.dumps(e, sort_keys=True)
+    )
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def observation_to_prompt(obs: Observation) -> str:
+    """Render an observation as raw JSON (see observation_text for the compact form)"""
+    return json.dumps(_as_dict(obs), separators=(',', ':'))
+
+
+def parse_actions(content: str) -> List[Action]:
+    """Parse a model reply into actions
+
+    Accepts either ``{"actions": [...]}`` or a bare JSON list. Entries that
+    are not valid actions are skipped.
+
+    Args:
+        content: Raw text returned by the model
+
+    Returns:
+        List of parsed actions (possibly empty)
+    """
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+    if isinstance(data, dict):
+        data = data.get('actions', [])
+    if not isinstance(data, list):
+        return []
+
+    actions = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        try:
+            actions.append(action_from_dict(item))
+        except ValueError:
+            continue
+    return actions
+
+
+class DecisionCache:
+    """Least-recently-used cache of decided action plans keyed by observation hash"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[Action, ...]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[Action, ...]]:
+        plan = self._entries.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return plan
+
+    def put(self, key: str, plan: Tuple[Action, ...]):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = plan
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class LLMPolicyRunner:
+    """Decide actions for many agents with concurrent, cached model calls"""
+
+    def __init__(
+        self,
+        client: Any = None,
+        model: str = DEFAULT_MODEL,
+        max_concurrency: int = 8,
+        cache_size: int = 1024,
+        plan_length: int = 4,
+        refill_threshold: int = 1,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        prompt_builder: Callable[[Observation], str] = render_observation,
+        temperature: float = 0.0,
+    ):
+        """
+        Args:
+            client: AsyncOpenAI-compatible client (created from the environment if omitted)
+            model: Model name passed to the chat completions API
+            max_concurrency: Maximum number of model calls in flight at once
+            cache_size: Number of observation → plan entries kept in the LRU cache
+            plan_length: Maximum number of actions kept per agent plan
+            refill_threshold: Request a new plan once this many actions or fewer remain
+            system_prompt: System message sent with every request
+            prompt_builder: Function rendering an observation into the user message
+            temperature: Sampling temperature for the model
+        """
+        if client is None:
+            if AsyncOpenAI is None:
+                raise ImportError("openai module not available. Install with: pip install openai")
+            client = AsyncOpenAI()
+        self.client = client
+        self.model = model
+        self.plan_length = plan_length
+        self.refill_threshold = refill_threshold
+        self.system_prompt = system_prompt
+        self.prompt_builder = prompt_builder
+        self.temperature = temperature
+        self.cache = DecisionCache(cache_size)
+        self.plans: Dict[str, Deque[Action]] = {}
+        self.calls = 0
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[str, 'asyncio.Task[List[Action]]'] = {}
+
+    def _limiter(self) -> asyncio.Semaphore:
+        # A semaphore binds to the loop that first waits on it, so a runner
+        # reused across asyncio.run() calls needs one per running loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _call_model(self, obs: Observation) -> Tuple[Action, ...]:
+        async with self._limiter():
+            with TRACER.span("policy_decision", model=self.model):
+                self.calls += 1
+                with TRACER.span("prompt_build"):
+                    prompt = self.prompt_builder(obs)
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {'role': 'system', 'content': self.system_prompt},
+                        {'role': 'user', 'content': prompt},
+                    ],
+                    temperature=self.temperature,
+                    response_format={'type': 'json_object'},
+                )
+                content = response.choices[0].message.content or ""
+                return tuple(parse_actions(content)[:self.plan_length])
+
+    async def _plan_for(self, obs: Observation) -> Tuple[Action, ...]:
+        key = observation_key(obs)
+        plan = self.cache.get(key)
+        if plan is not None:
+            return plan
+        try:
+            plan = await self._call_model(obs)
+        except Exception as e:
+            print(f"Model call failed: {e}")
+            return ()
+        if plan:
+            self.cache.put(key, plan)
+        return plan
+
+    async def decide_batch(self, observations: Dict[str, Observation]) -> Dict[str, List[Action]]:
+        """Decide a fresh plan for every agent
+
+        Agents whose observations hash to the same key share one model call.
+        The resulting plans replace each agent's speculative plan, and any
+        background refresh still running for these agents is cancelled so
+        it cannot overwrite them with a plan from an older observation.
+
+        Args:
+            observations: Mapping of agent id to its latest observation
+
+        Returns:
+            Mapping of agent id to its decided list of actions
+        """
+        for agent_id in observations:
+            task = self._inflight.pop(agent_id, None)
+            if task is not None:
+                task.cancel()
+
+        keys = {agent_id: observation_key(obs) for agent_id, obs in observations.items()}
+        unique: Dict[str, Observation] = {}
+        for agent_id, key in keys.items():
+            unique.setdefault(key, observations[agent_id])
+
+        plans = await asyncio.gather(*(self._plan_for(obs) for obs in unique.values()))
+        by_key = dict(zip(unique.keys(), plans))
+
+        result = {}
+        for agent_id, key in keys.items():
+            plan = by_key[key]
+            self.plans[agent_id] = deque(plan)
+            result[agent_id] = list(plan)
+        return result
+
+    async def decide(self, agent_id: str, obs: Observation) -> List[Action]:
+        """Decide a fresh plan for a single agent"""
+        return (await self.decide_batch({agent_id: obs}))[agent_id]
+
+    async def _refresh(self, agent_id: str, obs: Observation) -> List[Action]:
+        try:
+            plan = await self._plan_for(obs)
+            self.plans[agent_id] = deque(plan)
+            return list(plan)
+        finally:
+            # decide_batch may already have replaced this task
+            if self._inflight.get(agent_id) is asyncio.current_task():
+                del self._inflight[agent_id]
+
+    def next_action(self, agent_id: str) -> Optional[Action]:
+        """Pop the next action from an agent's speculative plan"""
+        plan = self.plans.get(agent_id)
+        if not plan:
+            return None
+        return plan.popleft()
+
+    async def step(self, observations: Dict[str, Observation]) -> Dict[str, Optional[Action]]:
+        """Return the next action for every agent without waiting on the model
+
+        Agents whose plan has ``refill_threshold`` actions or fewer left get
+        a background refresh started from their latest observation. Only
+        agents with an empty plan wait for their in-flight call; the rest
+        keep executing their speculative plan meanwhile.
+
+        Args:
+            observations: Mapping of agent id to its latest observation
+
+        Returns:
+            Mapping of agent id to the action to execute now (None if the
+            model produced no usable actions)
+        """
+        for agent_id, obs in observations.items():
+            plan = self.plans.get(agent_id)
+            if (plan is None or len(plan) <= self.refill_threshold) and agent_id not in self._inflight:
+                self._inflight[agent_id] = asyncio.create_task(self._refresh(agent_id, obs))
+
+        waiting = [
+            self._inflight[agent_id]
+            for agent_id in observations
+            if not self.plans.get(agent_id) and agent_id in self._inflight
+        ]
+        if waiting:
+            # A refresh cancelled by decide_batch has left a plan behind anyway
+            await asyncio.gather(*waiting, return_exceptions=True)
+
+        return {agent_id: self.next_action(agent_id) for agent_id in observations}
+
+    async def drain(self):
+        """Wait for all in-flight refreshes to finish"""
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight.values()), return_exceptions=True)
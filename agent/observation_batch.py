@@ -0,0 +1,103 @@
+"""Structure-of-arrays parsing for batches of observations
+
+Multi-agent loops that process every agent each step can parse all raw
+observation payloads into a handful of NumPy arrays instead of one object
+tree per agent. Per-agent fields become length-N arrays; blocks and entities
+are flattened into shared arrays with CSR-style offsets, so the blocks of
+agent ``i`` are ``block_pos[block_offsets[i]:block_offsets[i + 1]]``.
+Node and entity names are interned into code arrays with a shared vocabulary.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+
+from agent_client import LazyObservation
+
+
+@dataclass(slots=True)
+class ObservationBatch:
+    """Observations of N agents as flat arrays"""
+    position: np.ndarray         # (N, 3) float64
+    yaw: np.ndarray              # (N,) float64
+    pitch: np.ndarray            # (N,) float64
+    look_dir: np.ndarray         # (N, 3) float64
+    health: np.ndarray           # (N,) int32
+    state: List[str]
+    block_offsets: np.ndarray    # (N + 1,) int64
+    block_pos: np.ndarray        # (M, 3) int32
+    block_name: np.ndarray       # (M,) int32 codes into names
+    block_param1: np.ndarray     # (M,) uint8
+    block_param2: np.ndarray     # (M,) uint8
+    entity_offsets: np.ndarray   # (N + 1,) int64
+    entity_pos: np.ndarray       # (K, 3) float64
+    entity_distance: np.ndarray  # (K,) float64
+    entity_name: np.ndarray      # (K,) int32 codes into names
+    entity_is_player: np.ndarray  # (K,) bool
+    names: List[str]
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+    def blocks(self, i: int) -> slice:
+        """Slice of the block arrays that belongs to agent ``i``"""
+        return slice(int(self.block_offsets[i]), int(self.block_offsets[i + 1]))
+
+    def entities(self, i: int) -> slice:
+        """Slice of the entity arrays that belongs to agent ``i``"""
+        return slice(int(self.entity_offsets[i]), int(self.entity_offsets[i + 1]))
+
+    def name_code(self, name: str) -> int:
+        """Code of a node or entity name, or -1 if it does not occur in the batch"""
+        try:
+            return self.names.index(name)
+        except ValueError:
+            return -1
+
+    @classmethod
+    def from_dicts(cls, observations: Sequence[Union[Dict[str, Any], LazyObservation]]) -> 'ObservationBatch':
+        """Parse raw observation payloads (or ``LazyObservation``s) into one batch"""
+        raws = [o.raw if isinstance(o, LazyObservation) else o for o in observations]
+        vocab: Dict[str, int] = {}
+
+        def code(name: str) -> int:
+            c = vocab.get(name)
+            if c is None:
+                c = vocab[name] = len(vocab)
+            return c
+
+        blocks = [b for raw in raws for b in raw['surrounding_blocks']]
+        entities = [e for raw in raws for e in raw['nearby_entities']]
+        orientations = [raw['orientation'] for raw in raws]
+
+        return cls(
+            position=_xyz([raw['position'] for raw in raws], np.float64),
+            yaw=np.array([o['yaw'] for o in orientations], dtype=np.float64),
+            pitch=np.array([o['pitch'] for o in orientations], dtype=np.float64),
+            look_dir=_xyz([o['look_dir'] for o in orientations], np.float64),
+            health=np.array([raw['health'] for raw in raws], dtype=np.int32),
+            state=[raw['state'] for raw in raws],
+            block_offsets=_offsets([len(raw['surrounding_blocks']) for raw in raws]),
+            block_pos=_xyz([b['pos'] for b in blocks], np.int32),
+            block_name=np.array([code(b['name']) for b in blocks], dtype=np.int32),
+            block_param1=np.array([b['param1'] for b in blocks], dtype=np.uint8),
+            block_param2=np.array([b['param2'] for b in blocks], dtype=np.uint8),
+            entity_offsets=_offsets([len(raw['nearby_entities']) for raw in raws]),
+            entity_pos=_xyz([e['pos'] for e in entities], np.float64),
+            entity_distance=np.array([e['distance'] for e in entities], dtype=np.float64),
+            entity_name=np.array([code(e['name']) for e in entities], dtype=np.int32),
+            entity_is_player=np.array([e.get('type') == 'player' for e in entities], dtype=bool),
+            names=list(vocab),
+        )
+
+
+def _xyz(points: List[Dict[str, float]], dtype) -> np.ndarray:
+    flat = np.fromiter((v for p in points for v in (p['x'], p['y'], p['z'])), dtype=dtype, count=3 * len(points))
+    return flat.reshape(len(points), 3)
+
+
+def _offsets(counts: List[int]) -> np.ndarray:
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
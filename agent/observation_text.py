@@ -0,0 +1,290 @@
+"""Compact text rendering of observations for model prompts
+
+Observations are rendered as layered ASCII slices of the surrounding blocks
+with a symbol legend, coordinates relative to the agent and entities sorted
+by distance. ``IncrementalRenderer`` emits only what changed since the
+previous prompt, so the conversation so far stays a stable, cacheable prefix.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from agent_client import Observation
+
+AIR_SYMBOL = '.'
+UNSEEN_SYMBOL = '?'
+OVERFLOW_SYMBOL = '*'
+SYMBOL_POOL = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+FORMAT_PREAMBLE = """Observations use a compact text format.
+The first line gives the agent's world position as abs_pos=(x,y,z). All other
+coordinates are relative to the block at the agent's feet: x east, y up, z north.
+Blocks are drawn as horizontal slices from top (y+r) to bottom (y-r); each slice
+has one row per z from north (z+r) to south (z-r), and one column per x from
+west (x-r) to east (x+r). Symbols are defined in the legend; '.' is air and '?'
+is not observed. Entities are listed nearest first."""
+
+# Only true for IncrementalRenderer output; stateless frames never start with 'Δ'
+DELTA_PREAMBLE = "Later messages starting with 'Δ' list only what changed since the previous one."
+
+Cell = Tuple[int, int, int]
+
+
+def _round(value: float) -> int:
+    """Round half away from zero, like Lua's vector.round"""
+    rounded = math.floor(abs(value) + 0.5)
+    return -rounded if value < 0 else rounded
+
+
+def _num(value: float) -> str:
+    """Format a number with at most one decimal and no trailing zero"""
+    text = f"{value:.1f}"
+    if text.endswith('.0'):
+        text = text[:-2]
+    return '0' if text == '-0' else text
+
+
+def _rel(x: float, y: float, z: float) -> str:
+    return f"({_num(x)},{_num(y)},{_num(z)})"
+
+
+class SymbolTable:
+    """Assigns single-character symbols to node names
+
+    Symbols are never reassigned, so a legend emitted once stays valid for
+    the rest of the conversation.
+    """
+
+    def __init__(self):
+        self.symbols: Dict[str, str] = {'air': AIR_SYMBOL}
+        self._next = 0
+
+    def symbol(self, name: str) -> Tuple[str, bool]:
+        """Return the symbol for a node name and whether it was newly assigned"""
+        existing = self.symbols.get(name)
+        if existing is not None:
+            return existing, False
+        if self._next >= len(SYMBOL_POOL):
+            return OVERFLOW_SYMBOL, False
+        sym = SYMBOL_POOL[self._next]
+        self._next += 1
+        self.symbols[name] = sym
+        return sym, True
+
+    def legend(self, names: Optional[List[str]] = None) -> str:
+        names = names if names is not None else list(self.symbols)
+        return ' '.join(f"{self.symbols[n]}={n}" for n in names if n in self.symbols)
+
+
+def _origin(obs: Observation) -> Cell:
+    pos = obs.position
+    return (_round(pos.x), _round(pos.y), _round(pos.z))
+
+
+def _absolute_cells(obs: Observation) -> Dict[Cell, str]:
+    return {
+        (_round(b.pos.x), _round(b.pos.y), _round(b.pos.z)): b.name
+        for b in obs.surrounding_blocks
+    }
+
+
+def _radius(cells: Dict[Cell, str], origin: Cell) -> int:
+    radius = 0
+    for x, y, z in cells:
+        radius = max(radius, abs(x - origin[0]), abs(y - origin[1]), abs(z - origin[2]))
+    return radius
+
+
+def _header(obs: Observation) -> str:
+    pos = obs.position
+    return (
+        f"abs_pos={_rel(pos.x, pos.y, pos.z)} yaw={obs.orientation.yaw:.2f} "
+        f"pitch={obs.orientation.pitch:.2f} hp={obs.health} state={obs.state}"
+    )
+
+
+def _look_line(obs: Observation, origin: Cell) -> str:
+    target = obs.look_target
+    if target is None:
+        return "look=none"
+    parts = [f"look={target.target_type}"]
+    if target.name:
+        parts.append(target.name)
+    if target.pos is not None:
+        parts.append('@' + _rel(target.pos.x - origin[0], target.pos.y - origin[1], target.pos.z - origin[2]))
+    parts.append(f"d={_num(target.distance)}")
+    return ' '.join(parts)
+
+
+def _entity_lines(obs: Observation, origin: Cell) -> List[str]:
+    lines = []
+    for e in sorted(obs.nearby_entities, key=lambda e: e.distance):
+        label = e.player_name or e.name
+        rel = _rel(e.pos.x - origin[0], e.pos.y - origin[1], e.pos.z - origin[2])
+        lines.append(f"{e.entity_type} {label} @{rel} d={_num(e.distance)}")
+    return lines
+
+
+def _layer_lines(cells: Dict[Cell, str], origin: Cell, radius: int, symbols: SymbolTable) -> List[str]:
+    ox, oy, oz = origin
+    lines = []
+    for dy in range(radius, -radius - 1, -1):
+        lines.append(f"y{dy:+d}")
+        for dz in range(radius, -radius - 1, -1):
+            row = []
+            for dx in range(-radius, radius + 1):
+                name = cells.get((ox + dx, oy + dy, oz + dz))
+                row.append(UNSEEN_SYMBOL if name is None else symbols.symbol(name)[0])
+            lines.append(''.join(row))
+    return lines
+
+
+def _full_frame(obs: Observation, symbols: SymbolTable, cells: Dict[Cell, str], origin: Cell) -> str:
+    radius = _radius(cells, origin)
+    for name in sorted(set(cells.values())):
+        symbols.symbol(name)
+    used = sorted(set(cells.values()), key=lambda n: symbols.symbols.get(n, OVERFLOW_SYMBOL))
+
+    lines = [_header(obs), _look_line(obs, origin)]
+    if cells:
+        lines.append("legend " + symbols.legend(used))
+        lines.extend(_layer_lines(cells, origin, radius, symbols))
+    entity_lines = _entity_lines(obs, origin)
+    lines.append(f"entities {len(entity_lines)}")
+    lines.extend(entity_lines)
+    return '\n'.join(lines)
+
+
+def render_observation(obs: Observation) -> str:
+    """Render a single observation in the compact text format
+
+    Args:
+        obs: Observation to render
+
+    Returns:
+        Multi-line text; see FORMAT_PREAMBLE for how to read it
+    """
+    return _full_frame(obs, SymbolTable(), _absolute_cells(obs), _origin(obs))
+
+
+class IncrementalRenderer:
+    """Render a stream of observations as a keyframe followed by deltas
+
+    The first observation (and every ``keyframe_interval``-th one after
+    that) is rendered in full. Other observations only list the header
+    fields, blocks and entities that changed since the previous render.
+    Symbols are kept across renders, so the legend is only extended.
+    """
+
+    def __init__(self, keyframe_interval: int = 20):
+        """
+        Args:
+            keyframe_interval: Emit a full frame after this many deltas (0 disables)
+        """
+        self.keyframe_interval = keyframe_interval
+        self.prefix = FORMAT_PREAMBLE + '\n' + DELTA_PREAMBLE
+        self.reset()
+
+    def reset(self):
+        """Forget previous renders; the next call emits a full frame"""
+        self.symbols = SymbolTable()
+        self.last_was_keyframe = False
+        self._cells: Dict[Cell, str] = {}
+        self._header: Optional[str] = None
+        self._look: Optional[str] = None
+        self._entities: Optional[List[str]] = None
+        self._origin: Optional[Cell] = None
+        self._announced: set = set()
+        self._since_keyframe = 0
+
+    def render(self, obs: Observation) -> str:
+        """Render an observation relative to the previous one
+
+        Args:
+            obs: Latest observation
+
+        Returns:
+            Full frame or a delta starting with 'Δ'
+        """
+        cells = _absolute_cells(obs)
+        origin = _origin(obs)
+        header = _header(obs)
+        look = _look_line(obs, origin)
+        entities = _entity_lines(obs, origin)
+
+        delta: Optional[str] = None
+        changed = 0
+        if self._origin is not None and not (
+            self.keyframe_interval and self._since_keyframe >= self.keyframe_interval
+        ):
+            delta, changed = self._delta(cells, origin, self._origin, header, look, entities)
+
+        if delta is not None and changed * 8 <= len(cells):
+            text, keyframe = delta, False
+        else:
+            # Large deltas (e.g. after moving) can cost more than a keyframe
+            full = _full_frame(obs, self.symbols, cells, origin)
+            if delta is not None and len(delta) < len(full):
+                text, keyframe = delta, False
+            else:
+                text, keyframe = full, True
+
+        if keyframe:
+            self._announced = set(cells.values())
+            self._since_keyframe = 0
+        else:
+            self._since_keyframe += 1
+        self.last_was_keyframe = keyframe
+
+        self._cells = cells
+        self._origin = origin
+        self._header = header
+        self._look = look
+        self._entities = entities
+        return text
+
+    def _delta(self, cells: Dict[Cell, str], origin: Cell, previous: Cell, header: str, look: str,
+               entities: List[str]) -> Tuple[str, int]:
+        ox, oy, oz = origin
+        lines = ["Δ"]
+        if origin != previous:
+            px, py, pz = previous
+            lines.append(f"moved {_rel(ox - px, oy - py, oz - pz)}")
+        if header != self._header:
+            lines.append(header)
+        if look != self._look:
+            lines.append(look)
+
+        radius = _radius(cells, origin)
+        changed: Dict[Cell, Optional[str]] = {
+            cell: name for cell, name in cells.items() if self._cells.get(cell) != name
+        }
+        for cell in self._cells:
+            if cell not in cells and max(abs(cell[0] - ox), abs(cell[1] - oy), abs(cell[2] - oz)) <= radius:
+                changed[cell] = None
+
+        new_names = []
+        changes = []
+        for cell in sorted(changed):
+            name = changed[cell]
+            if name is None:
+                sym = UNSEEN_SYMBOL
+            else:
+                sym = self.symbols.symbol(name)[0]
+                if name not in self._announced:
+                    self._announced.add(name)
+                    new_names.append(name)
+            x, y, z = cell
+            changes.append(f"{_rel(x - ox, y - oy, z - oz)}{sym}")
+        if new_names:
+            lines.append("legend+ " + self.symbols.legend(new_names))
+        if changes:
+            lines.append("blocks " + ' '.join(changes))
+
+        if entities != self._entities:
+            lines.append(f"entities {len(entities)}")
+            lines.extend(entities)
+
+        if len(lines) == 1:
+            lines.append("no change")
+        return '\n'.join(lines), len(changes)
@@ -0,0 +1,279 @@
+"""Timing spans for the agent control loop
+
+A ``Tracer`` records named spans (start and duration in microseconds of
+wall-clock time) from the Python client, the bot servers and, via
+``POST /trace``, the Lua mod. Spans can be exported as a Chrome trace
+(open in ``chrome://tracing`` or Perfetto), as folded stacks for
+flamegraph tools, or summarized per name.
+
+Sampling is decided once per root span: when a root span is sampled out,
+every span nested inside it is skipped as well, so kept traces stay whole.
+
+Tracing is off by default. Enable the shared tracer with::
+
+    from profiling import TRACER
+    TRACER.configure(sample_rate=0.1)
+"""
+
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+DEFAULT_MAX_SPANS = 100_000
+
+# Stack of open span names in the current thread or task; None means the
+# enclosing root span was not sampled
+_STACK: contextvars.ContextVar[Optional[tuple]] = contextvars.ContextVar('trace_stack', default=())
+
+
+def now_us() -> int:
+    """Wall-clock time in microseconds (shared time base for all processes)"""
+    return time.time_ns() // 1000
+
+
+@dataclass(slots=True)
+class Span:
+    """A finished timing span"""
+    name: str
+    start_us: int
+    duration_us: int
+    process: str
+    thread: str
+    stack: tuple = ()
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    def to_chrome_event(self, pid: int, tid: int) -> Dict[str, Any]:
+        event = {
+            'name': self.name,
+            'cat': self.name.split(':', 1)[0],
+            'ph': 'X',
+            'ts': self.start_us,
+            'dur': self.duration_us,
+            'pid': pid,
+            'tid': tid,
+        }
+        if self.args:
+            event['args'] = self.args
+        return event
+
+
+class Tracer:
+    """Thread- and asyncio-safe span recorder with sampling"""
+
+    def __init__(self, process: str = "agent", sample_rate: float = 0.0, max_spans: int = DEFAULT_MAX_SPANS):
+        """
+        Args:
+            process: Process label used in exported traces
+            sample_rate: Fraction of root spans to record (0 disables tracing)
+            max_spans: Oldest spans are dropped beyond this many
+        """
+        self.process = process
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def configure(self, sample_rate: Optional[float] = None, process: Optional[str] = None) -> None:
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if process is not None:
+            self.process = process
+
+    def sample(self) -> bool:
+        """Decide whether a new root span is recorded"""
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        """Time the enclosed block
+
+        Args:
+            name: Span name, e.g. ``http_send`` or ``execute_action:dig``
+            **args: Extra values attached to the span
+        """
+        stack = _STACK.get()
+        if not self.enabled or stack is None:
+            yield
+            return
+        if not stack and not self.sample():
+            # Root span sampled out: suppress nested spans too
+            token = _STACK.set(None)
+            try:
+                yield
+            finally:
+                _STACK.reset(token)
+            return
+
+        token = _STACK.set(stack + (name,))
+        start = now_us()
+        try:
+            yield
+        finally:
+            _STACK.reset(token)
+            self._append(Span(name, start, now_us() - start, self.process,
+                              threading.current_thread().name, stack, args))
+
+    def record(
+        self,
+        name: str,
+        start_us: int,
+        duration_us: int,
+        process: Optional[str] = None,
+        thread: str = "main",
+        **args: Any,
+    ) -> None:
+        """Add a span measured elsewhere (no sampling is applied)"""
+        self._append(Span(name, int(start_us), int(duration_us), process or self.process, thread, (), args))
+
+    def ingest(self, payload: Dict[str, Any], received_us: Optional[int] = None) -> int:
+        """Add spans posted by another process
+
+        The payload carries ``process``, ``now_us`` (the sender's clock when it
+        sent the batch) and ``spans`` with ``name``, ``ts``, ``dur`` and
+        optional ``tid`` / ``stack`` / ``args``. Timestamps are shifted onto this
+        process's clock using ``now_us``.
+
+        Returns:
+            Number of spans added
+
+        Raises:
+            ValueError: If the payload is malformed
+        """
+        spans = payload.get('spans') if isinstance(payload, dict) else None
+        if not isinstance(spans, list):
+            raise ValueError("missing spans")
+        offset = 0
+        if isinstance(payload.get('now_us'), (int, float)):
+            offset = (received_us if received_us is not None else now_us()) - int(payload['now_us'])
+        process = str(payload.get('process') or 'remote')
+
+        added = []
+        for s in spans:
+            try:
+                added.append(Span(str(s['name']), int(s['ts']) + offset, int(s['dur']), process,
+                                  str(s.get('tid', 'main')), tuple(s.get('stack') or ()), s.get('args') or {}))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"invalid span: {s!r}") from e
+        with self._lock:
+            self._spans.extend(added)
+        return len(added)
+
+    def drain_payload(self) -> Dict[str, Any]:
+        """Remove all spans and return them in the format ``ingest`` accepts"""
+        with self._lock:
+            spans = list(self._spans)
+            self._spans.clear()
+        return {
+            'process': self.process,
+            'now_us': now_us(),
+            'spans': [
+                {'name': s.name, 'ts': s.start_us, 'dur': s.duration_us, 'tid': s.thread,
+                 'stack': list(s.stack), 'args': s.args}
+                for s in spans
+            ],
+        }
+
+    def _append(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Export spans in the Chrome trace event format"""
+        pids: Dict[str, int] = {}
+        tids: Dict[tuple, int] = {}
+        events: List[Dict[str, Any]] = []
+        for s in self.spans():
+            if s.process not in pids:
+                pids[s.process] = len(pids) + 1
+                events.append({'name': 'process_name', 'ph': 'M', 'pid': pids[s.process],
+                               'args': {'name': s.process}})
+            pid = pids[s.process]
+            if (s.process, s.thread) not in tids:
+                tids[(s.process, s.thread)] = len(tids) + 1
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                               'tid': tids[(s.process, s.thread)], 'args': {'name': s.thread}})
+            events.append(s.to_chrome_event(pid, tids[(s.process, s.thread)]))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_folded(self) -> str:
+        """Export self time per stack in folded format (``a;b;c <microseconds>``)
+
+        Feed the output to ``flamegraph.pl`` or speedscope.
+        """
+        spans = self.spans()
+        children: Dict[tuple, int] = {}
+        for s in spans:
+            if s.stack:
+                key = (s.process, s.thread) + s.stack
+                children[key] = children.get(key, 0) + s.duration_us
+
+        # Child time is known per stack path, not per parent instance, so
+        # subtract it from the path's total rather than from each span
+        durations: Dict[tuple, int] = {}
+        for s in spans:
+            key = (s.process, s.thread) + s.stack + (s.name,)
+            durations[key] = durations.get(key, 0) + s.duration_us
+
+        totals: Dict[str, int] = {}
+        for key, total_us in durations.items():
+            self_us = max(0, total_us - children.get(key, 0))
+            line = ';'.join((key[0],) + key[2:])
+            totals[line] = totals.get(line, 0) + self_us
+        return '\n'.join(f"{line} {us}" for line, us in sorted(totals.items())) + '\n'
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, mean, p50, p95 and total duration (ms) per span name"""
+        by_name: Dict[str, List[int]] = {}
+        for s in self.spans():
+            by_name.setdefault(s.name, []).append(s.duration_us)
+
+        result = {}
+        for name, durations in sorted(by_name.items()):
+            durations.sort()
+            n = len(durations)
+            result[name] = {
+                'count': n,
+                'mean_ms': sum(durations) / n / 1000,
+                'p50_ms': durations[n // 2] / 1000,
+                'p95_ms': durations[min(n - 1, int(n * 0.95))] / 1000,
+                'total_ms': sum(durations) / 1000,
+            }
+        return result
+
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def write_folded(self, path: str) -> None:
+        with open(path, 'w') as f:
+            f.write(self.to_folded())
+
+
+def env_sample_rate() -> float:
+    """Sample rate from ``AGENT_TRACE_SAMPLE_RATE`` (0 if unset or invalid)"""
+    try:
+        return float(os.environ.get("AGENT_TRACE_SAMPLE_RATE", "0"))
+    except ValueError:
+        return 0.0
+
+
+# Shared tracer for this process; off unless AGENT_TRACE_SAMPLE_RATE is set
+TRACER = Tracer(sample_rate=env_sample_rate())
@@ -23,6 +23,14 @@ def test_imports():
             UseAction,
             SetObservationOptionsAction,
             ChatAction,
+            ScriptAction,
+            SequenceAction,
+            RepeatUntilAction,
+            WaitAction,
+            CancelScriptAction,
+            LookTargetCondition,
+            NodeCondition,
+            PositionCondition,
         )
         print("✓ All imports successful")
         return True
@@ -124,13 +132,103 @@ def test_action_serialization():
         chat_dict = chat_action.to_dict()
         assert chat_dict['type'] == 'chat'
         assert chat_dict['message'] == "Test message"
-        
+
+        # Test round trip through action_from_dict
+        from agent_client import action_from_dict
+        for action in actions:
+            assert action_from_dict(action.to_dict()).to_dict() == action.to_dict()
+        print("✓ action_from_dict round trip works")
+
         return True
     except Exception as e:
         print(f"✗ Action serialization failed: {e}")
         return False
 
 
+def test_script_serialization():
+    """Test that script actions serialize to the mod's script format"""
+    print("\nTesting script serialization...")
+    try:
+        from agent_client import (
+            Position, DigAction, MoveAction, ScriptAction, RepeatUntilAction,
+            WaitAction, CancelScriptAction, NodeCondition, LookTargetCondition,
+            PositionCondition, action_from_dict,
+        )
+
+        target = Position(x=1, y=2, z=3)
+        script = ScriptAction([
+            RepeatUntilAction(DigAction(), NodeCondition(target, "air"), max_iterations=20),
+            MoveAction("forward"),
+            WaitAction(0.5),
+            RepeatUntilAction([MoveAction("forward")], PositionCondition(target, radius=1.0), timeout=5.0),
+        ], script_id="tunnel", timeout=30.0)
+        script_dict = script.to_dict()
+
+        assert script_dict['type'] == 'script'
+        assert script_dict['script_id'] == 'tunnel'
+        assert script_dict['timeout'] == 30.0
+        steps = script_dict['body']['steps']
+        assert script_dict['body']['type'] == 'sequence'
+        assert steps[0] == {
+            'type': 'repeat_until',
+            'body': {'type': 'dig'},
+            'condition': {'type': 'node', 'pos': {'x': 1, 'y': 2, 'z': 3}, 'name': 'air'},
+            'max_iterations': 20,
+        }
+        assert steps[3]['body']['type'] == 'sequence'
+        assert steps[3]['condition']['radius'] == 1.0
+        print("✓ ScriptAction serialization works")
+
+        assert LookTargetCondition(name="air", negate=True).to_dict() == {
+            'type': 'look_target', 'name': 'air', 'negate': True
+        }
+        assert CancelScriptAction().to_dict() == {'type': 'cancel_script'}
+        assert ScriptAction(DigAction()).script_id != ScriptAction(DigAction()).script_id
+
+        assert action_from_dict(script_dict).to_dict() == script_dict
+        print("✓ Script round trip works")
+        return True
+    except Exception as e:
+        print(f"✗ Script serialization failed: {e}")
+        return False
+
+
+def test_snapshot_actions():
+    """Test snapshot and reset actions"""
+    print("\nTesting snapshot actions...")
+    try:
+        from agent_client import (
+            AgentClient, LazyObservation, Position, SnapshotAction, RestoreSnapshotAction, action_from_dict,
+        )
+
+        region = SnapshotAction("ep0", minp=Position(x=-8, y=0, z=-8), maxp=Position(x=8, y=16, z=8))
+        region_dict = region.to_dict()
+        assert region_dict == {
+            'type': 'snapshot',
+            'snapshot_id': 'ep0',
+            'minp': {'x': -8, 'y': 0, 'z': -8},
+            'maxp': {'x': 8, 'y': 16, 'z': 8},
+        }
+        assert SnapshotAction("ep1", radius=12).to_dict() == {'type': 'snapshot', 'snapshot_id': 'ep1', 'radius': 12}
+        assert RestoreSnapshotAction("ep0").to_dict() == {'type': 'restore_snapshot', 'snapshot_id': 'ep0'}
+        assert action_from_dict(region_dict).to_dict() == region_dict
+        print("✓ Snapshot actions serialize")
+
+        sent = []
+        client = AgentClient("http://localhost:8000")
+        client.send_action = lambda action, priority=None, deadline=None, flush=False: sent.append(
+            (action.to_dict(), {'priority': priority, 'flush': flush})) or True
+        client.last_observation = LazyObservation({})
+        assert client.reset("ep0")
+        assert sent[-1] == ({'type': 'restore_snapshot', 'snapshot_id': 'ep0'}, {'priority': 'urgent', 'flush': True})
+        assert client.last_observation is None
+        print("✓ AgentClient.reset flushes the queue with an urgent restore and clears the observation")
+        return True
+    except Exception as e:
+        print(f"✗ Snapshot action test failed: {e}")
+        return False
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -142,6 +240,8 @@ def main():
         test_data_structures,
         test_client_creation,
         test_action_serialization,
+        test_script_serialization,
+        test_snapshot_actions,
     ]
     
     results = []
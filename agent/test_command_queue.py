@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Tests for the bot server's priority command queue"""
+
+import sys
+import threading
+from http.server import HTTPServer
+
+import requests
+
+from command_queue import CommandQueue, parse_limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_priority_order():
+    """Test that urgent commands jump ahead of queued bulk work"""
+    print("Testing priority order...")
+    try:
+        queue = CommandQueue()
+        queue.put_many([{'type': 'chat', 'message': str(i), 'priority': 'bulk'} for i in range(3)])
+        queue.put({'type': 'move', 'direction': 'forward'})
+        queue.put({'type': 'look_at', 'yaw': 0.0, 'priority': 'urgent'})
+        queue.put({'type': 'rotate', 'yaw_delta': 0.1, 'priority': 'high'})
+
+        batch = queue.pop_batch(10)
+        assert [c['type'] for c in batch] == ['look_at', 'rotate', 'move', 'chat', 'chat', 'chat']
+        assert [c['message'] for c in batch[3:]] == ['0', '1', '2']
+        assert all('priority' not in c for c in batch)
+        print("✓ Lanes drain most urgent first, FIFO within a lane")
+        return True
+    except Exception as e:
+        print(f"✗ Priority order test failed: {e}")
+        return False
+
+
+def test_deadlines_and_limit():
+    """Test deadline expiry and the per-poll delivery cap"""
+    print("\nTesting deadlines and limit...")
+    try:
+        clock = FakeClock()
+        queue = CommandQueue(clock=clock)
+        queue.put({'type': 'look_at', 'yaw': 1.0, 'priority': 'urgent', 'deadline': 0.5})
+        queue.put({'type': 'dig', 'deadline': 5})
+        queue.put_many([{'type': 'place', 'node': 'default:stone', 'priority': 'bulk'}] * 5)
+
+        clock.now = 1.0
+        batch = queue.pop_batch(3)
+        assert batch[0] == {'type': 'dig'}
+        assert len(batch) == 3
+        assert queue.stats() == {'urgent': 0, 'high': 0, 'normal': 0, 'bulk': 3, 'expired': 1, 'flushed': 0}
+        print("✓ Expired commands are dropped and batches are capped")
+
+        for bad in ({'type': 'dig', 'priority': 'asap'}, {'type': 'dig', 'deadline': 'soon'}):
+            try:
+                queue.put_many([{'type': 'dig'}, bad])
+                raise AssertionError(f"accepted {bad}")
+            except ValueError:
+                pass
+        assert len(queue) == 3
+        print("✓ Invalid batches are rejected as a whole")
+
+        queue.put_many([{'type': 'dig'}, {'type': 'restore_snapshot', 'snapshot_id': 'ep0',
+                                          'priority': 'urgent', 'flush': True}])
+        queue.put({'type': 'move', 'direction': 'forward'})
+        assert queue.pop_batch(10) == [{'type': 'restore_snapshot', 'snapshot_id': 'ep0'},
+                                       {'type': 'move', 'direction': 'forward'}]
+        assert queue.stats()['flushed'] == 4
+        try:
+            queue.put({'type': 'dig', 'flush': 'yes'})
+            raise AssertionError("accepted non-boolean flush")
+        except ValueError:
+            pass
+        print("✓ A flushing command drops everything queued before it")
+
+        assert parse_limit(None) == 32
+        assert parse_limit("8") == 8
+        assert parse_limit("1000") == 32
+        assert parse_limit("0") == 1
+        assert parse_limit("x") == 32
+        print("✓ parse_limit clamps to the server cap")
+        return True
+    except Exception as e:
+        print(f"✗ Deadline test failed: {e}")
+        return False
+
+
+def test_bot_server():
+    """Test /enqueue and /next?limit on the stdlib bot server"""
+    print("\nTesting bot server endpoints...")
+    import bot_server
+
+    server = HTTPServer(("127.0.0.1", 0), bot_server.Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        bot_server.QUEUE.pop_batch(1000)
+        response = requests.post(f"{url}/enqueue", json=[
+            {'type': 'chat', 'message': 'hi', 'priority': 'bulk'},
+            {'type': 'look_at', 'yaw': 0.0, 'priority': 'urgent', 'deadline': 1.0},
+        ], timeout=2)
+        assert response.json() == {'queued': 2}
+
+        response = requests.get(f"{url}/next?limit=1", timeout=2)
+        assert response.json() == {'commands': [{'type': 'look_at', 'yaw': 0.0}]}
+        response = requests.get(f"{url}/next", timeout=2)
+        assert response.json() == {'commands': [{'type': 'chat', 'message': 'hi'}]}
+
+        response = requests.post(f"{url}/enqueue", json={'type': 'dig', 'priority': 'asap'}, timeout=2)
+        assert response.status_code == 400
+        print("✓ Server honours priorities, limit and rejects unknown lanes")
+        return True
+    except Exception as e:
+        print(f"✗ Bot server test failed: {e}")
+        return False
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Command Queue Tests")
+    print("=" * 60)
+
+    tests = [
+        test_priority_order,
+        test_deadlines_and_limit,
+        test_bot_server,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+
+    if passed == total:
+        print("\n✓ All tests passed!")
+        return 0
+    else:
+        print(f"\n✗ {total - passed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Tests for batched living agent decisions"""
+
+import sys
+import threading
+from http.server import HTTPServer
+
+
+def lua_rules(agent):
+    """Reference implementation of default_decision in the agent_api mod"""
+    focus = agent.get('focus_distance')
+    threat = agent.get('threat_distance')
+    if agent['fatigue'] > 85:
+        return 'rest'
+    if threat is not None and threat < 3:
+        return 'avoid'
+    if focus is not None and focus < 8:
+        return 'follow'
+    if agent['hunger'] > 60 and agent['fatigue'] < 60:
+        return 'wander'
+    return 'idle'
+
+
+def test_matches_lua_rules():
+    """Test that the vectorized brain matches the Lua rules"""
+    print("Testing rule parity...")
+    try:
+        import random
+        from living_brain import LivingBrain, decide_batch
+
+        rng = random.Random(0)
+        agents = []
+        for i in range(500):
+            agents.append({
+                'id': f"living_{i}",
+                'hunger': rng.uniform(0, 100),
+                'fatigue': rng.uniform(0, 100),
+                'behavior': 'idle',
+                'focus_distance': rng.choice([None, rng.uniform(0, 8)]),
+                'threat_distance': rng.choice([None, rng.uniform(0, 3)]),
+            })
+
+        decisions = decide_batch(agents, LivingBrain(rest_until_fatigue=None))
+        assert len(decisions) == 500
+        for agent in agents:
+            assert decisions[agent['id']] == lua_rules(agent), agent
+        print("✓ 500 agents decided identically to the Lua rules")
+        return True
+    except Exception as e:
+        print(f"✗ Rule parity test failed: {e}")
+        return False
+
+
+def test_rest_hysteresis():
+    """Test that resting agents keep resting until recovered"""
+    print("\nTesting rest hysteresis...")
+    try:
+        from living_brain import decide_batch
+
+        decisions = decide_batch([
+            {'id': 'a', 'hunger': 0, 'fatigue': 70, 'behavior': 'rest'},
+            {'id': 'b', 'hunger': 0, 'fatigue': 70, 'behavior': 'idle'},
+            {'id': 'c', 'hunger': 0, 'fatigue': 40, 'behavior': 'rest'},
+        ])
+        assert decisions == {'a': 'rest', 'b': 'idle', 'c': 'idle'}, decisions
+        print("✓ Resting agents recover before switching")
+        return True
+    except Exception as e:
+        print(f"✗ Rest hysteresis test failed: {e}")
+        return False
+
+
+def test_malformed_batch():
+    """Test that empty and malformed batches are handled"""
+    print("\nTesting malformed batches...")
+    try:
+        from living_brain import decide_batch
+
+        assert decide_batch([]) == {}
+        assert decide_batch([{'hunger': 1}, "x"]) == {}
+        assert decide_batch([{'id': 'a'}]) == {'a': 'idle'}
+        for bad in ('very', [1], {'x': 1}):
+            try:
+                decide_batch([{'id': 'a', 'hunger': bad}])
+                raise AssertionError(f"accepted hunger={bad!r}")
+            except ValueError:
+                pass
+        print("✓ Malformed batches are handled")
+        return True
+    except Exception as e:
+        print(f"✗ Malformed batch test failed: {e}")
+        return False
+
+
+def test_bot_server():
+    """Test /living/decide on the stdlib bot server"""
+    print("\nTesting /living/decide...")
+    import requests
+    import bot_server
+
+    server = HTTPServer(("127.0.0.1", 0), bot_server.Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/living/decide"
+    try:
+        response = requests.post(url, json={'agents': [{'id': 'a', 'hunger': 90, 'fatigue': 0}]}, timeout=2)
+        assert response.json() == {'decisions': {'a': 'wander'}}, response.text
+        response = requests.post(url, json={'agents': [{'id': 'a', 'hunger': 'very'}]}, timeout=2)
+        assert response.status_code == 400 and 'hunger' in response.json()['error']
+        assert requests.post(url, json={'agents': 'a'}, timeout=2).status_code == 400
+        print("✓ Server decides batches and rejects non-numeric fields")
+        return True
+    except Exception as e:
+        print(f"✗ Bot server test failed: {e}")
+        return False
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Living Brain Tests")
+    print("=" * 60)
+
+    tests = [
+        test_matches_lua_rules,
+        test_rest_hysteresis,
+        test_malformed_batch,
+        test_bot_server,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+
+    if passed == total:
+        print("\n✓ All tests passed!")
+        return 0
+    else:
+        print(f"\n✗ {total - passed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
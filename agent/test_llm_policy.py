@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""Tests for the batched LLM policy runner against a local stub model server"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+STUB_ACTIONS = [
+    {'type': 'move', 'direction': 'forward', 'speed': 1.0},
+    {'type': 'rotate', 'yaw_delta': 0.1},
+    {'type': 'dig'},
+]
+
+
+class StubModelServer:
+    """Minimal OpenAI-compatible chat completions server"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                self.rfile.read(length)
+                with stub._lock:
+                    stub.requests += 1
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.active -= 1
+
+                body = json.dumps({
+                    'id': 'chatcmpl-stub',
+                    'object': 'chat.completion',
+                    'created': 0,
+                    'model': 'stub',
+                    'choices': [{
+                        'index': 0,
+                        'finish_reason': 'stop',
+                        'message': {'role': 'assistant', 'content': json.dumps({'actions': STUB_ACTIONS})},
+                    }],
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_observation(x: float = 0.0, entities=None):
+    from agent_client import Observation
+
+    return Observation.from_dict({
+        'position': {'x': x, 'y': 10.0, 'z': 0.0},
+        'orientation': {'yaw': 0.0, 'pitch': 0.0, 'look_dir': {'x': 0.0, 'y': 0.0, 'z': 1.0}},
+        'surrounding_blocks': [
+            {'pos': {'x': 0, 'y': 9, 'z': 0}, 'name': 'default:stone', 'param1': 0, 'param2': 0},
+        ],
+        'nearby_entities': entities or [],
+        'look_target': None,
+        'health': 20,
+        'state': 'idle',
+    })
+
+
+def make_runner(stub, **kwargs):
+    from openai import AsyncOpenAI
+    from llm_policy import LLMPolicyRunner
+
+    client = AsyncOpenAI(base_url=stub.base_url, api_key="test", max_retries=0)
+    return LLMPolicyRunner(client=client, model="stub", **kwargs)
+
+
+def openai_available() -> bool:
+    from llm_policy import OPENAI_AVAILABLE
+
+    if not OPENAI_AVAILABLE:
+        print("- openai not installed, skipping")
+    return OPENAI_AVAILABLE
+
+
+def test_observation_key():
+    """Test that observation keys are canonical"""
+    print("Testing observation key...")
+    try:
+        from llm_policy import observation_key
+
+        a = {'pos': {'x': 1.0, 'y': 0.0, 'z': 0.0}, 'distance': 1.0, 'name': 'a', 'type': 'entity'}
+        b = {'pos': {'x': 2.0, 'y': 0.0, 'z': 0.0}, 'distance': 2.0, 'name': 'b', 'type': 'entity'}
+
+        assert observation_key(make_observation(0.0, [a, b])) == observation_key(make_observation(0.0, [b, a]))
+        assert observation_key(make_observation(0.01)) == observation_key(make_observation(0.02))
+        assert observation_key(make_observation(0.0)) != observation_key(make_observation(5.0))
+
+        print("✓ Observation key is canonical")
+        return True
+    except Exception as e:
+        print(f"✗ Observation key test failed: {e}")
+        return False
+
+
+def test_decision_cache():
+    """Test LRU eviction of the decision cache"""
+    print("\nTesting decision cache...")
+    try:
+        from llm_policy import DecisionCache
+        from agent_client import DigAction
+
+        cache = DecisionCache(maxsize=2)
+        cache.put('a', (DigAction(),))
+        cache.put('b', (DigAction(),))
+        assert cache.get('a') is not None
+        cache.put('c', (DigAction(),))
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
+        assert len(cache) == 2
+
+        print("✓ Decision cache evicts least recently used entries")
+        return True
+    except Exception as e:
+        print(f"✗ Decision cache test failed: {e}")
+        return False
+
+
+def test_parse_actions():
+    """Test parsing of model replies"""
+    print("\nTesting reply parsing...")
+    try:
+        from llm_policy import parse_actions
+        from agent_client import MoveAction, DigAction
+
+        actions = parse_actions(json.dumps({'actions': [
+            {'type': 'move', 'direction': 'left'},
+            {'type': 'teleport'},
+            {'type': 'dig'},
+        ]}))
+        assert [type(a) for a in actions] == [MoveAction, DigAction]
+        assert parse_actions("not json") == []
+        assert len(parse_actions(json.dumps([{'type': 'use'}]))) == 1
+
+        print("✓ Replies parse into actions")
+        return True
+    except Exception as e:
+        print(f"✗ Reply parsing test failed: {e}")
+        return False
+
+
+def test_batched_decisions():
+    """Test bounded concurrency and caching of batched decisions"""
+    print("\nTesting batched decisions...")
+    if not openai_available():
+        return True
+    try:
+        with StubModelServer(delay=0.05) as stub:
+            runner = make_runner(stub, max_concurrency=3)
+            observations = {f"agent_{i}": make_observation(float(i)) for i in range(8)}
+            observations['agent_dup'] = make_observation(0.0)
+
+            plans = asyncio.run(runner.decide_batch(observations))
+            assert len(plans) == 9
+            assert all(len(plan) == 3 for plan in plans.values())
+            assert stub.requests == 8, stub.requests
+            assert stub.max_active <= 3, stub.max_active
+            print(f"✓ 9 agents decided with {stub.requests} calls, max {stub.max_active} concurrent")
+
+            asyncio.run(runner.decide_batch(observations))
+            assert stub.requests == 8
+            assert runner.cache.hits >= 8
+            print("✓ Repeated observations are served from cache")
+        return True
+    except Exception as e:
+        print(f"✗ Batched decision test failed: {e}")
+        return False
+
+
+def test_reuse_across_loops():
+    """Test that a runner keeps its concurrency limit across event loops"""
+    print("\nTesting runner reuse across event loops...")
+    if not openai_available():
+        return True
+    try:
+        with StubModelServer(delay=0.05) as stub:
+            runner = make_runner(stub, max_concurrency=2)
+            first = {f"agent_{i}": make_observation(float(i)) for i in range(6)}
+            second = {f"agent_{i}": make_observation(float(i + 100)) for i in range(6)}
+
+            assert all(len(plan) == 3 for plan in asyncio.run(runner.decide_batch(first)).values())
+            # All misses, so calls have to wait on the limit inside a new loop
+            plans = asyncio.run(runner.decide_batch(second))
+            assert all(len(plan) == 3 for plan in plans.values()), plans
+            assert stub.requests == 12, stub.requests
+            assert stub.max_active <= 2, stub.max_active
+        print("✓ Cache misses in a second asyncio.run() all get plans")
+        return True
+    except Exception as e:
+        print(f"✗ Runner reuse test failed: {e}")
+        return False
+
+
+def test_speculative_plan():
+    """Test that agents keep acting from their plan while a refresh is in flight"""
+    print("\nTesting speculative plans...")
+    if not openai_available():
+        return True
+    try:
+        from agent_client import MoveAction, RotateAction
+
+        async def scenario(runner):
+            first = await runner.step({'a': make_observation(0.0)})
+            assert isinstance(first['a'], MoveAction)
+
+            # Plan now holds 2 actions; the next step must not wait on the model
+            start = time.perf_counter()
+            second = await runner.step({'a': make_observation(1.0)})
+            assert isinstance(second['a'], RotateAction)
+            assert time.perf_counter() - start < 0.2
+
+            # Only 1 action left, so a refresh is started in the background
+            await runner.step({'a': make_observation(2.0)})
+            assert 'a' in runner._inflight
+            await runner.drain()
+            assert len(runner.plans['a']) == 3
+
+            # A forced decision supersedes a refresh that is still in flight.
+            # The decision is a cache hit, so without cancelling, the slower
+            # refresh from the older observation would land after it.
+            await runner.decide('b', make_observation(5.0))
+            runner.next_action('a')
+            runner.next_action('a')
+            await runner.step({'a': make_observation(4.0)})
+            stale = runner._inflight['a']
+            fresh = await runner.decide('a', make_observation(5.0))
+            await asyncio.sleep(0.4)
+            assert stale.cancelled()
+            assert 'a' not in runner._inflight
+            assert all(x is y for x, y in zip(runner.plans['a'], fresh)) and len(runner.plans['a']) == 3
+
+        with StubModelServer(delay=0.3) as stub:
+            asyncio.run(scenario(make_runner(stub, refill_threshold=1)))
+
+        print("✓ Speculative plan keeps the queue non-empty")
+        return True
+    except Exception as e:
+        print(f"✗ Speculative plan test failed: {e}")
+        return False
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("LLM Policy Runner Tests")
+    print("=" * 60)
+
+    tests = [
+        test_observation_key,
+        test_decision_cache,
+        test_parse_actions,
+        test_batched_decisions,
+        test_reuse_across_loops,
+        test_speculative_plan,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+
+    if passed == total:
+        print("\n✓ All tests passed!")
+        return 0
+    else:
+        print(f"\n✗ {total - passed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
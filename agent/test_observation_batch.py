@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Tests for lazy observations and structure-of-arrays batches"""
+
+import random
+import sys
+
+from bench_observation_text import make_observation
+
+
+def test_lazy_observation():
+    """Test that a lazy observation matches the eager dataclass"""
+    print("Testing lazy observation...")
+    try:
+        from agent_client import AgentClient, LazyObservation, Observation
+
+        raw = make_observation(random.Random(0), 3, -2)
+        lazy = LazyObservation(raw)
+        eager = Observation.from_dict(raw)
+
+        assert lazy.raw is raw
+        assert lazy.position == eager.position
+        assert lazy.surrounding_blocks._items.count(None) == len(raw['surrounding_blocks'])
+        assert lazy.surrounding_blocks[5] == eager.surrounding_blocks[5]
+        assert lazy.surrounding_blocks[5] is lazy.surrounding_blocks[5]
+        assert lazy.surrounding_blocks._items.count(None) == len(raw['surrounding_blocks']) - 1
+        assert lazy.nearby_entities == eager.nearby_entities
+        assert lazy.to_observation() == eager
+        print("✓ Fields are parsed on access and match Observation")
+
+        assert not hasattr(eager.position, '__dict__')
+        assert not hasattr(lazy, '__dict__')
+        print("✓ Observation classes use __slots__")
+
+        client = AgentClient(lazy_observations=True)
+        client.update_observation(raw)
+        assert isinstance(client.get_observation(), LazyObservation)
+        print("✓ AgentClient stores lazy observations when asked")
+        return True
+    except Exception as e:
+        print(f"✗ Lazy observation test failed: {e}")
+        return False
+
+
+def test_observation_batch():
+    """Test parsing several observations into flat arrays"""
+    print("\nTesting observation batch...")
+    try:
+        from agent_client import LazyObservation
+        from observation_batch import ObservationBatch
+
+        raws = [make_observation(random.Random(i), i, 0) for i in range(3)]
+        raws[2]['nearby_entities'] = []
+        batch = ObservationBatch.from_dicts([raws[0], LazyObservation(raws[1]), raws[2]])
+
+        assert len(batch) == 3
+        assert batch.position.shape == (3, 3)
+        assert batch.position[1].tolist() == [1.31, 8.0, -0.12]
+        assert batch.block_offsets.tolist() == [0, 125, 250, 375]
+        assert batch.entity_offsets.tolist() == [0, 3, 6, 6]
+
+        first = raws[1]['surrounding_blocks'][0]
+        i = batch.blocks(1).start
+        assert batch.block_pos[i].tolist() == [first['pos']['x'], first['pos']['y'], first['pos']['z']]
+        assert batch.names[batch.block_name[i]] == first['name']
+
+        grass = batch.name_code('default:dirt_with_grass')
+        assert int((batch.block_name[batch.blocks(0)] == grass).sum()) == 25
+        assert batch.name_code('default:diamond') == -1
+        assert batch.entity_is_player[batch.entities(0)].tolist() == [True, False, False]
+        print("✓ Batch arrays and offsets match the payloads")
+        return True
+    except Exception as e:
+        print(f"✗ Observation batch test failed: {e}")
+        return False
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Observation Parsing Tests")
+    print("=" * 60)
+
+    tests = [
+        test_lazy_observation,
+        test_observation_batch,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+
+    if passed == total:
+        print("\n✓ All tests passed!")
+        return 0
+    else:
+        print(f"\n✗ {total - passed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Tests for compact observation rendering"""
+
+import json
+import sys
+
+
+def make_observation_dict(x: float = 0.0, radius: int = 2, overrides=None, entities=None):
+    """Build a raw observation with stone below the agent and air above"""
+    ox, oy, oz = round(x), 10, 0
+    blocks = []
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            for dz in range(-radius, radius + 1):
+                pos = (ox + dx, oy + dy, oz + dz)
+                name = 'default:stone' if dy < 0 else 'air'
+                if overrides and pos in overrides:
+                    name = overrides[pos]
+                blocks.append({
+                    'pos': {'x': pos[0], 'y': pos[1], 'z': pos[2]},
+                    'name': name, 'param1': 0, 'param2': 0,
+                })
+    return {
+        'position': {'x': x, 'y': 10.0, 'z': 0.0},
+        'orientation': {'yaw': 0.0, 'pitch': 0.0, 'look_dir': {'x': 0.0, 'y': 0.0, 'z': 1.0}},
+        'surrounding_blocks': blocks,
+        'nearby_entities': entities or [],
+        'look_target': {'type': 'node', 'pos': {'x': ox, 'y': 9, 'z': oz + 1}, 'name': 'default:stone', 'distance': 1.8},
+        'health': 20,
+        'state': 'idle',
+    }
+
+
+def test_render_observation():
+    """Test the full compact rendering"""
+    print("Testing full rendering...")
+    try:
+        from agent_client import Observation
+        from observation_text import render_observation
+
+        entities = [
+            {'pos': {'x': 5.0, 'y': 10.0, 'z': 0.0}, 'distance': 5.0, 'name': 'bob', 'type': 'player', 'player_name': 'bob'},
+            {'pos': {'x': 1.0, 'y': 10.0, 'z': 0.0}, 'distance': 1.0, 'name': 'mobs:sheep', 'type': 'entity'},
+        ]
+        raw = make_observation_dict(overrides={(0, 8, 0): 'default:dirt'}, entities=entities)
+        text = render_observation(Observation.from_dict(raw))
+        lines = text.split('\n')
+
+        assert lines[0].startswith('abs_pos=(0,10,0)')
+        assert lines[1] == 'look=node default:stone @(0,-1,1) d=1.8'
+        assert 'a=default:dirt' in lines[2] and 'b=default:stone' in lines[2]
+        # 5 layers of a 5x5 grid, each preceded by a header
+        assert lines[3] == 'y+2' and lines[4] == '.....'
+        assert lines[3 + 6 * 4 + 3] == 'bbabb', lines[3 + 6 * 4 + 3]
+        assert lines[-3] == 'entities 2'
+        assert lines[-2].startswith('entity mobs:sheep @(1,0,0)')
+        assert lines[-1].startswith('player bob @(5,0,0)')
+
+        assert len(text) * 5 < len(json.dumps(raw))
+        print(f"✓ Rendered {len(text)} chars vs {len(json.dumps(raw))} chars of JSON")
+
+        # Halves round away from zero, like the mod's vector.round
+        from observation_text import _round
+        assert [_round(v) for v in (-1.5, -0.5, -0.4, 0.5, 1.5)] == [-2, -1, 0, 1, 2]
+        print("✓ Positions round half away from zero")
+        return True
+    except Exception as e:
+        print(f"✗ Full rendering test failed: {e}")
+        return False
+
+
+def test_incremental_rendering():
+    """Test keyframes and deltas"""
+    print("\nTesting incremental rendering...")
+    try:
+        from agent_client import Observation
+        from observation_text import DELTA_PREAMBLE, FORMAT_PREAMBLE, IncrementalRenderer
+
+        renderer = IncrementalRenderer(keyframe_interval=3)
+        assert renderer.prefix.endswith(DELTA_PREAMBLE) and DELTA_PREAMBLE not in FORMAT_PREAMBLE
+        first = renderer.render(Observation.from_dict(make_observation_dict()))
+        assert renderer.last_was_keyframe and not first.startswith('Δ')
+
+        same = renderer.render(Observation.from_dict(make_observation_dict()))
+        assert same == 'Δ\nno change', same
+
+        dug = renderer.render(Observation.from_dict(
+            make_observation_dict(overrides={(0, 9, 1): 'air', (1, 9, 0): 'default:gravel'})
+        ))
+        assert not renderer.last_was_keyframe
+        assert 'legend+ b=default:gravel' in dug, dug
+        assert '(0,-1,1).' in dug
+
+        moved = renderer.render(Observation.from_dict(make_observation_dict(x=1.0)))
+        assert renderer.last_was_keyframe or 'moved (1,0,0)' in moved
+
+        # With keyframe_interval=3 a full frame recurs after 3 consecutive deltas
+        keyframes = []
+        for _ in range(4):
+            renderer.render(Observation.from_dict(make_observation_dict(x=1.0)))
+            keyframes.append(renderer.last_was_keyframe)
+        assert keyframes.count(True) == 1, keyframes
+
+        print("✓ Deltas list only changes and keyframes recur")
+        return True
+    except Exception as e:
+        print(f"✗ Incremental rendering test failed: {e}")
+        return False
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Observation Text Rendering Tests")
+    print("=" * 60)
+
+    tests = [
+        test_render_observation,
+        test_incremental_rendering,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+
+    if passed == total:
+        print("\n✓ All tests passed!")
+        return 0
+    else:
+        print(f"\n✗ {total - passed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Tests for timing spans and trace export"""
+
+import json
+import sys
+import threading
+from http.server import HTTPServer
+
+from profiling import Tracer
+
+
+def test_spans_and_sampling():
+    """Test nesting, sampling and the export formats"""
+    print("Testing spans and sampling...")
+    try:
+        tracer = Tracer(process="test", sample_rate=1.0)
+        with tracer.span("step"):
+            with tracer.span("serialize"):
+                pass
+            with tracer.span("http_send", path="/enqueue"):
+                pass
+
+        spans = {s.name: s for s in tracer.spans()}
+        assert spans['serialize'].stack == ('step',)
+        assert spans['http_send'].args == {'path': '/enqueue'}
+        assert spans['step'].duration_us >= spans['serialize'].duration_us
+
+        folded = tracer.to_folded().splitlines()
+        assert [line.rsplit(' ', 1)[0] for line in folded] == [
+            'test;step', 'test;step;http_send', 'test;step;serialize'
+        ]
+        events = tracer.to_chrome_trace()['traceEvents']
+        assert {e['name'] for e in events if e['ph'] == 'X'} == {'step', 'serialize', 'http_send'}
+        assert any(e['ph'] == 'M' and e['args'] == {'name': 'test'} for e in events)
+        assert tracer.summary()['step']['count'] == 1
+
+        # Child time is subtracted once per parent path, not from every repeat
+        repeated = Tracer()
+        repeated.ingest({'process': 'agent', 'spans': [
+            span for i in range(3) for span in (
+                {'name': 'step', 'ts': i * 20_000, 'dur': 10_000},
+                {'name': 'serialize', 'ts': i * 20_000, 'dur': 4_000, 'stack': ['step']},
+            )
+        ]})
+        assert repeated.to_folded().splitlines() == ['agent;step 18000', 'agent;step;serialize 12000']
+        print("✓ Nested spans export to Chrome and folded formats")
+
+        sampled = Tracer(sample_rate=0.5)
+        for _ in range(200):
+            with sampled.span("root"):
+                with sampled.span("child"):
+                    pass
+        roots = sum(1 for s in sampled.spans() if s.name == 'root')
+        children = sum(1 for s in sampled.spans() if s.name == 'child')
+        assert 0 < roots < 200 and roots == children
+
+        off = Tracer()
+        with off.span("root"):
+            pass
+        assert off.spans() == []
+        print("✓ Sampling keeps or drops whole traces")
+        return True
+    except Exception as e:
+        print(f"✗ Span test failed: {e}")
+        return False
+
+
+def test_ingest():
+    """Test merging spans posted by another process"""
+    print("\nTesting span ingest...")
+    try:
+        tracer = Tracer(process="bot_server")
+        added = tracer.ingest({
+            'process': 'luanti',
+            'now_us': 1_000,
+            'spans': [{'name': 'execute_action:dig', 'ts': 400, 'dur': 50}],
+        }, received_us=10_000)
+        assert added == 1
+        span = tracer.spans()[0]
+        assert (span.process, span.start_us, span.duration_us) == ('luanti', 9_400, 50)
+
+        try:
+            tracer.ingest({'spans': [{'name': 'x'}]})
+            raise AssertionError("accepted span without timing")
+        except ValueError:
+            pass
+
+        client = Tracer(process="agent", sample_rate=1.0)
+        with client.span("policy_decision"):
+            with client.span("prompt_build"):
+                pass
+        assert tracer.ingest(client.drain_payload()) == 2
+        assert client.spans() == []
+        assert any(s.stack == ('policy_decision',) for s in tracer.spans())
+        print("✓ Remote spans are shifted onto the local clock")
+        return True
+    except Exception as e:
+        print(f"✗ Ingest test failed: {e}")
+        return False
+
+
+def test_server_trace():
+    """Test time_queued spans and the /trace endpoints"""
+    print("\nTesting bot server tracing...")
+    import requests
+    import bot_server
+    import profiling
+
+    server = HTTPServer(("127.0.0.1", 0), bot_server.Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    rate = bot_server.TRACER.sample_rate
+    try:
+        # The server records into its own tracer instead of relabelling the shared one
+        assert profiling.TRACER.process == 'agent' and bot_server.TRACER is not profiling.TRACER
+        bot_server.TRACER.configure(sample_rate=1.0)
+        requests.delete(f"{url}/trace", timeout=2)
+        requests.post(f"{url}/enqueue", json={'type': 'dig', 'priority': 'high'}, timeout=2)
+        requests.get(f"{url}/next", timeout=2)
+        response = requests.post(f"{url}/trace", json={
+            'process': 'luanti', 'now_us': 0, 'spans': [{'name': 'poll_wait', 'ts': 0, 'dur': 900}],
+        }, timeout=2)
+        assert response.json() == {'received': 1}
+
+        trace = requests.get(f"{url}/trace", timeout=2).json()
+        queued = [e for e in trace['traceEvents'] if e['name'] == 'time_queued']
+        assert len(queued) == 1 and queued[0]['args'] == {'type': 'dig'}
+        assert any(e['name'] == 'poll_wait' for e in trace['traceEvents'])
+
+        folded = requests.get(f"{url}/trace", params={'format': 'folded'}, timeout=2).text
+        assert 'luanti;poll_wait 900' in folded
+        summary = requests.get(f"{url}/trace", params={'format': 'summary'}, timeout=2).json()
+        assert json.dumps(summary) and summary['poll_wait']['count'] == 1
+
+        assert requests.post(f"{url}/trace", json={'spans': 'x'}, timeout=2).status_code == 400
+        print("✓ Server records queue time and merges posted spans")
+        return True
+    except Exception as e:
+        print(f"✗ Server trace test failed: {e}")
+        return False
+    finally:
+        bot_server.TRACER.configure(sample_rate=rate)
+        bot_server.TRACER.clear()
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Profiling Tests")
+    print("=" * 60)
+
+    tests = [
+        test_spans_and_sampling,
+        test_ingest,
+        test_server_trace,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+
+    if passed == total:
+        print("\n✓ All tests passed!")
+        return 0
+    else:
+        print(f"\n✗ {total - passed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
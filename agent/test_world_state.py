@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Tests for the shared multi-agent world state"""
+
+import sys
+import threading
+from http.server import HTTPServer
+from typing import Any, List
+
+from world_state import WorldState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def block(x, y, z, name):
+    return {'pos': {'x': x, 'y': y, 'z': z}, 'name': name, 'param1': 0, 'param2': 0}
+
+
+def observation(x, blocks, entities=()):
+    return {
+        'position': {'x': x, 'y': 0.0, 'z': 0.0},
+        'surrounding_blocks': list(blocks),
+        'nearby_entities': list(entities),
+        'health': 20,
+        'state': 'idle',
+    }
+
+
+def test_fusion_and_versions():
+    """Test that observations from several agents merge with version stamps"""
+    print("Testing fusion and versions...")
+    try:
+        world = WorldState()
+        assert world.observe('alice', observation(0, [block(0, -1, 0, 'default:dirt'), block(1, -1, 0, 'default:dirt')])) \
+            == {'version': 1, 'changed': 3}
+        # bob re-observes one block unchanged and sees a new one
+        result = world.observe('bob', observation(40, [block(1, -1, 0, 'default:dirt'), block(40, -1, 0, 'default:sand')]))
+        assert result == {'version': 2, 'changed': 2}
+        known = world.get_block({'x': 1, 'y': -1, 'z': 0})
+        assert known is not None and known['observed_by'] == 'alice'
+
+        # alice digs a block: only that block changes
+        world.observe('alice', observation(0, [block(0, -1, 0, 'air'), block(1, -1, 0, 'default:dirt')]))
+        changes = world.changes(since=2)
+        assert changes['version'] == 3
+        assert [(b['pos']['x'], b['name'], b['version']) for b in changes['blocks']] == [(0, 'air', 3)]
+        assert len(world.changes(since=0)['blocks']) == 3
+        print("✓ Observations merge and changes carry version stamps")
+
+        region = world.changes(since=0, minp={'x': 30, 'y': -5, 'z': -5}, maxp={'x': 50, 'y': 5, 'z': 5})
+        assert [b['name'] for b in region['blocks']] == ['default:sand']
+        assert [e['key'] for e in region['entities']] == ['player:bob']
+        print("✓ Region queries only return what is inside the region")
+
+        # With many known chunks, a small region is answered from its own chunks
+        world.observe('carol', observation(200, [block(x, -1, 0, 'default:gravel') for x in range(0, 800, 16)]))
+        small = world.changes(since=0, minp={'x': 30, 'y': -5, 'z': -5}, maxp={'x': 50, 'y': 5, 'z': 5})
+        assert sorted(b['name'] for b in small['blocks']) == ['default:gravel', 'default:gravel', 'default:sand']
+        assert len(world.changes(since=3, minp={'x': 0, 'y': -1, 'z': 0}, maxp={'x': 799, 'y': -1, 'z': 0})['blocks']) == 50
+        print("✓ Region lookups agree whether chunks are scanned or enumerated")
+        return True
+    except Exception as e:
+        print(f"✗ Fusion test failed: {e}")
+        return False
+
+
+def test_entities_and_subscriptions():
+    """Test entity tracking and region subscriptions"""
+    print("\nTesting entities and subscriptions...")
+    try:
+        clock = FakeClock()
+        world = WorldState(entity_ttl=5.0, clock=clock)
+        item = {'pos': {'x': 3.0, 'y': 0.0, 'z': 0.0}, 'distance': 3.0, 'name': '__builtin:item', 'type': 'entity'}
+        world.observe('alice', observation(0, [], [item]))
+        sub = world.subscribe('bob', {'x': -8, 'y': -8, 'z': -8}, {'x': 8, 'y': 8, 'z': 8})
+
+        first = world.poll(sub)
+        assert sorted(e['key'] for e in first['entities']) == ['__builtin:item@3,0,0', 'player:alice']
+        assert world.poll(sub)['entities'] == []
+
+        # The item is picked up: alice no longer reports it next to her
+        world.observe('alice', observation(0, [block(2, 0, 0, 'default:stone')]))
+        update = world.poll(sub)
+        assert update['removed_entities'] == ['__builtin:item@3,0,0']
+        assert [b['name'] for b in update['blocks']] == ['default:stone']
+        print("✓ Subscriptions only deliver new changes")
+
+        # A far away observer does not remove alice, but the TTL does
+        clock.now = 10.0
+        world.observe('carol', observation(100, []))
+        assert 'player:alice' in world.poll(sub)['removed_entities']
+        assert world.entities_near({'x': 100, 'y': 0, 'z': 0}, 1.0)[0]['key'] == 'player:carol'
+
+        assert world.unsubscribe(sub) and not world.unsubscribe(sub)
+        bad_since: List[Any] = [None, '3', 1.5]
+        for since in bad_since:
+            try:
+                world.subscribe('bob', {'x': 0, 'y': 0, 'z': 0}, {'x': 1, 'y': 1, 'z': 1}, since)
+                raise AssertionError(f"accepted since={since!r}")
+            except ValueError:
+                pass
+        try:
+            world.observe('alice', {'surrounding_blocks': []})
+            raise AssertionError("accepted observation without position")
+        except ValueError:
+            pass
+        print("✓ Stale entities expire and bad input is rejected")
+        return True
+    except Exception as e:
+        print(f"✗ Entity test failed: {e}")
+        return False
+
+
+def test_client_and_server():
+    """Test the /world endpoints through AgentClient"""
+    print("\nTesting world endpoints...")
+    import bot_server
+    from agent_client import AgentClient, Position
+
+    server = HTTPServer(("127.0.0.1", 0), bot_server.Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        bot_server.WORLD = WorldState()
+        alice = AgentClient(url, agent_id='alice')
+        bob = AgentClient(url, agent_id='bob')
+
+        sub = bob.subscribe_region(Position(x=-4, y=-4, z=-4), Position(x=4, y=4, z=4))
+        assert sub is not None
+        assert alice.publish_observation(observation(0, [block(1, -1, 0, 'default:dirt')])) == {'version': 1, 'changed': 2}
+
+        changes = bob.world_changes(sub)
+        assert changes is not None and [b['name'] for b in changes['blocks']] == ['default:dirt']
+        again = bob.world_changes(sub)
+        assert again is not None and again['blocks'] == []
+        everything = bob.world_changes(since=0)
+        assert everything is not None and len(everything['blocks']) == 1
+        assert bob.unsubscribe_region(sub)
+        assert bob.world_changes(sub) is None
+        assert AgentClient(url).publish_observation(observation(0, [])) is None
+
+        import requests
+        region = {'agent_id': 'bob', 'minp': {'x': 0, 'y': 0, 'z': 0}, 'maxp': {'x': 1, 'y': 1, 'z': 1}}
+        for bad in ({'since': None}, {'since': 'soon'}, {'minp': None}):
+            response = requests.post(f"{url}/world/subscribe", json=dict(region, **bad), timeout=2)
+            assert response.status_code == 400, (bad, response.status_code)
+        response = requests.post(f"{url}/world/observe", json={'agent_id': 'bob'}, timeout=2)
+        assert response.status_code == 400
+        print("✓ Agents share observations through the bot server")
+        return True
+    except Exception as e:
+        print(f"✗ World endpoint test failed: {e}")
+        return False
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("World State Tests")
+    print("=" * 60)
+
+    tests = [
+        test_fusion_and_versions,
+        test_entities_and_subscriptions,
+        test_client_and_server,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+
+    if passed == total:
+        print("\n✓ All tests passed!")
+        return 0
+    else:
+        print(f"\n✗ {total - passed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
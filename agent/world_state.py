@@ -0,0 +1,342 @@
+"""Shared world state fused from the observations of every agent
+
+Agents working in the same area observe the same terrain. ``WorldState``
+merges their observations into one view of blocks and entities so that an
+agent can read what others have already seen instead of observing it again.
+
+Every merged observation gets a new version number, and every block or
+entity it changed is stamped with it. Blocks are indexed by chunk with the
+latest version per chunk, so ``changes(since, minp, maxp)`` only visits
+chunks in the region that changed after ``since``. Subscriptions remember
+the last version they delivered and return only newer changes.
+
+Players are tracked by name, and each observer is recorded as a player at
+its own position, so ``agent_id`` should be the agent's player name. Other
+entities carry no id in observations, so they are keyed by name and rounded
+position; a sighting that an observer no longer reports within
+``entity_radius`` of itself, or that nobody has seen for ``entity_ttl``
+seconds, is removed.
+"""
+
+import itertools
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from agent_client import LazyObservation
+
+Vec3 = Tuple[int, int, int]
+
+DEFAULT_CHUNK_SIZE = 16
+DEFAULT_ENTITY_RADIUS = 10.0  # matches the mod's get_nearby_entities radius
+DEFAULT_ENTITY_TTL = 5.0
+DEFAULT_MAX_REMOVALS = 10_000
+
+
+@dataclass(slots=True)
+class BlockRecord:
+    """Latest known state of one node"""
+    name: str
+    param1: int
+    param2: int
+    version: int
+    observed_by: str
+
+    def to_dict(self, pos: Vec3) -> Dict[str, Any]:
+        return {
+            'pos': {'x': pos[0], 'y': pos[1], 'z': pos[2]},
+            'name': self.name,
+            'param1': self.param1,
+            'param2': self.param2,
+            'version': self.version,
+            'observed_by': self.observed_by,
+        }
+
+
+@dataclass(slots=True)
+class EntityRecord:
+    """Latest sighting of one player or entity"""
+    key: str
+    pos: Tuple[float, float, float]
+    name: str
+    entity_type: str
+    player_name: Optional[str]
+    version: int
+    seen_at: float
+    observed_by: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'key': self.key,
+            'pos': {'x': self.pos[0], 'y': self.pos[1], 'z': self.pos[2]},
+            'name': self.name,
+            'type': self.entity_type,
+            'player_name': self.player_name,
+            'version': self.version,
+            'observed_by': self.observed_by,
+        }
+
+
+@dataclass(slots=True)
+class Subscription:
+    """A region an agent follows, and the last version delivered to it"""
+    agent_id: str
+    minp: Vec3
+    maxp: Vec3
+    cursor: int
+
+
+def _vec(data: Dict[str, Any]) -> Tuple[float, float, float]:
+    return (data['x'], data['y'], data['z'])
+
+
+def _node(data: Dict[str, Any]) -> Vec3:
+    return (int(math.floor(data['x'] + 0.5)), int(math.floor(data['y'] + 0.5)), int(math.floor(data['z'] + 0.5)))
+
+
+def _bounds(minp: Dict[str, Any], maxp: Dict[str, Any]) -> Tuple[Vec3, Vec3]:
+    try:
+        a, b = _node(minp), _node(maxp)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"invalid region: {e}") from e
+    return (min(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2])), (max(a[0], b[0]), max(a[1], b[1]), max(a[2], b[2]))
+
+
+def _inside(pos, minp: Vec3, maxp: Vec3) -> bool:
+    return all(lo <= v <= hi for v, lo, hi in zip(pos, minp, maxp))
+
+
+def _entity_key(data: Dict[str, Any]) -> str:
+    if data.get('type') == 'player' and data.get('player_name'):
+        return f"player:{data['player_name']}"
+    x, y, z = _node(data['pos'])
+    return f"{data.get('name', 'unknown')}@{x},{y},{z}"
+
+
+class WorldState:
+    """Thread-safe fused view of blocks and entities with version stamps"""
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        entity_radius: float = DEFAULT_ENTITY_RADIUS,
+        entity_ttl: float = DEFAULT_ENTITY_TTL,
+        max_removals: int = DEFAULT_MAX_REMOVALS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            chunk_size: Edge length (nodes) of the chunks used to index changes
+            entity_radius: Radius around an observer in which unreported entities are removed
+            entity_ttl: Seconds an entity is kept without being seen
+            max_removals: Entity removals remembered for ``changes``
+            clock: Time source in seconds (overridable for tests)
+        """
+        self.chunk_size = chunk_size
+        self.entity_radius = entity_radius
+        self.entity_ttl = entity_ttl
+        self.max_removals = max_removals
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.version = 0
+        self._blocks: Dict[Vec3, BlockRecord] = {}
+        self._chunks: Dict[Vec3, Set[Vec3]] = {}
+        self._chunk_versions: Dict[Vec3, int] = {}
+        self._entities: Dict[str, EntityRecord] = {}
+        self._removed: List[Tuple[int, str]] = []
+        self._agents: Dict[str, Tuple[float, float, float]] = {}
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._subscription_ids = itertools.count(1)
+
+    def _chunk(self, pos: Vec3) -> Vec3:
+        size = self.chunk_size
+        return (pos[0] // size, pos[1] // size, pos[2] // size)
+
+    def observe(self, agent_id: str, observation: Union[Dict[str, Any], LazyObservation]) -> Dict[str, int]:
+        """Merge one agent's observation
+
+        Args:
+            agent_id: Observing agent
+            observation: Raw observation payload (as sent by the mod) or ``LazyObservation``
+
+        Returns:
+            ``version`` after the merge and the number of ``changed`` blocks and entities
+
+        Raises:
+            ValueError: If the observation is malformed
+        """
+        raw = observation.raw if isinstance(observation, LazyObservation) else observation
+        try:
+            position = _vec(raw['position'])
+            blocks = [(_node(b['pos']), b['name'], b.get('param1', 0), b.get('param2', 0))
+                      for b in raw.get('surrounding_blocks') or []]
+            entities = list(raw.get('nearby_entities') or [])
+            # The observer is a player too; others may want to know where it is
+            entities.append({'pos': raw['position'], 'name': agent_id, 'type': 'player', 'player_name': agent_id})
+            sightings = [(_entity_key(e), e) for e in entities]
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"invalid observation: {e}") from e
+
+        now = self._clock()
+        with self._lock:
+            version = self.version + 1
+            changed = 0
+
+            for pos, name, param1, param2 in blocks:
+                record = self._blocks.get(pos)
+                if record is not None:
+                    if (record.name, record.param1, record.param2) == (name, param1, param2):
+                        continue
+                    record.name, record.param1, record.param2 = name, param1, param2
+                    record.version, record.observed_by = version, agent_id
+                else:
+                    self._blocks[pos] = BlockRecord(name, param1, param2, version, agent_id)
+                    self._chunks.setdefault(self._chunk(pos), set()).add(pos)
+                self._chunk_versions[self._chunk(pos)] = version
+                changed += 1
+
+            seen = set()
+            for key, e in sightings:
+                seen.add(key)
+                pos = _vec(e['pos'])
+                record = self._entities.get(key)
+                if record is not None and record.pos == pos:
+                    record.seen_at = now
+                    continue
+                self._entities[key] = EntityRecord(
+                    key, pos, e.get('name', 'unknown'), e.get('type', 'unknown'),
+                    e.get('player_name'), version, now, agent_id)
+                changed += 1
+
+            for key, record in list(self._entities.items()):
+                if key in seen:
+                    continue
+                out_of_date = now - record.seen_at > self.entity_ttl
+                missing = math.dist(record.pos, position) <= self.entity_radius
+                if out_of_date or missing:
+                    del self._entities[key]
+                    self._removed.append((version, key))
+                    changed += 1
+            if len(self._removed) > self.max_removals:
+                del self._removed[:len(self._removed) - self.max_removals]
+
+            self._agents[agent_id] = position
+            if changed:
+                self.version = version
+            return {'version': self.version, 'changed': changed}
+
+    def changes(
+        self,
+        since: int = 0,
+        minp: Optional[Dict[str, Any]] = None,
+        maxp: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Blocks and entities that changed after version ``since``
+
+        Args:
+            since: Last version the caller has seen (0 for everything known)
+            minp: One corner of the region of interest (whole world if omitted)
+            maxp: Opposite corner of the region
+
+        Returns:
+            ``version``, changed ``blocks`` and ``entities``, and the keys of
+            ``removed_entities``
+
+        Raises:
+            ValueError: If the region is malformed
+        """
+        region = _bounds(minp, maxp) if minp is not None and maxp is not None else None
+        with self._lock:
+            return self._changes(since, region)
+
+    def _changes(self, since: int, region: Optional[Tuple[Vec3, Vec3]]) -> Dict[str, Any]:
+        blocks = []
+        if region is not None:
+            (lo, hi) = region
+            clo, chi = self._chunk(lo), self._chunk(hi)
+            xs, ys, zs = (range(a, b + 1) for a, b in zip(clo, chi))
+            if len(xs) * len(ys) * len(zs) < len(self._chunk_versions):
+                # Look up the region's chunks rather than scanning every known chunk
+                versions = self._chunk_versions
+                chunks = [(x, y, z) for x in xs for y in ys for z in zs if versions.get((x, y, z), 0) > since]
+            else:
+                chunks = [c for c, v in self._chunk_versions.items()
+                          if v > since and _inside(c, clo, chi)]
+        else:
+            chunks = [c for c, v in self._chunk_versions.items() if v > since]
+        for chunk in chunks:
+            for pos in self._chunks[chunk]:
+                record = self._blocks[pos]
+                if record.version > since and (region is None or _inside(pos, *region)):
+                    blocks.append(record.to_dict(pos))
+
+        entities = [r.to_dict() for r in self._entities.values()
+                    if r.version > since and (region is None or _inside(r.pos, *region))]
+        # Removals are not tied to a region: a key that left the region must be dropped too
+        removed = [key for version, key in self._removed if version > since and key not in self._entities]
+        return {
+            'version': self.version,
+            'blocks': blocks,
+            'entities': entities,
+            'removed_entities': removed,
+        }
+
+    def get_block(self, pos: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Latest known state of the node at ``pos``, or None if nobody has seen it"""
+        key = _node(pos)
+        with self._lock:
+            record = self._blocks.get(key)
+            return record.to_dict(key) if record else None
+
+    def entities_near(self, pos: Dict[str, Any], radius: float) -> List[Dict[str, Any]]:
+        """Known entities within ``radius`` of ``pos``, nearest first"""
+        center = _vec(pos)
+        with self._lock:
+            hits = [(math.dist(r.pos, center), r) for r in self._entities.values()]
+        return [dict(r.to_dict(), distance=d) for d, r in sorted(hits, key=lambda h: h[0]) if d <= radius]
+
+    def subscribe(self, agent_id: str, minp: Dict[str, Any], maxp: Dict[str, Any], since: int = 0) -> str:
+        """Follow a region; the first ``poll`` returns everything known after ``since``
+
+        Returns:
+            Subscription id
+
+        Raises:
+            ValueError: If the region or ``since`` is malformed
+        """
+        if isinstance(since, bool) or not isinstance(since, int):
+            raise ValueError(f"invalid since: {since!r}")
+        lo, hi = _bounds(minp, maxp)
+        with self._lock:
+            subscription_id = f"sub_{next(self._subscription_ids)}"
+            self._subscriptions[subscription_id] = Subscription(agent_id, lo, hi, since)
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        with self._lock:
+            return self._subscriptions.pop(subscription_id, None) is not None
+
+    def poll(self, subscription_id: str) -> Dict[str, Any]:
+        """Changes in a subscribed region since the previous poll
+
+        Raises:
+            KeyError: If the subscription does not exist
+        """
+        with self._lock:
+            subscription = self._subscriptions[subscription_id]
+            result = self._changes(subscription.cursor, (subscription.minp, subscription.maxp))
+            subscription.cursor = result['version']
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'version': self.version,
+                'blocks': len(self._blocks),
+                'chunks': len(self._chunks),
+                'entities': len(self._entities),
+                'agents': len(self._agents),
+                'subscriptions': len(self._subscriptions),
+            }
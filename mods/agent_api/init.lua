@@ -19,6 +19,8 @@ agent_api.config = {
     bot_server_url = minetest.settings:get("agent_api.bot_server_url") or "http://bot:8000",
     -- Polling interval in seconds
     poll_interval = tonumber(minetest.settings:get("agent_api.poll_interval")) or 0.2,
+    -- Most commands the bot server may deliver per poll (keeps a backlog from stalling one tick)
+    max_commands_per_poll = tonumber(minetest.settings:get("agent_api.max_commands_per_poll")) or 16,
     -- Agent name
     agent_name = minetest.settings:get("agent_api.agent_name") or "AIAgent",
     -- Debug logging
@@ -32,6 +34,28 @@ agent_api.config = {
     living_mesh = minetest.settings:get("agent_api.living_mesh") or DEFAULT_LIVING_MESH,
     living_default_texture = minetest.settings:get("agent_api.living_default_texture") or "unknown_node.png",
     living_use_skinsdb = minetest.settings:get_bool("agent_api.living_use_skinsdb", true),
+    -- Action scripts: instructions each agent may run per server tick, and max concurrent scripts
+    script_budget = tonumber(minetest.settings:get("agent_api.script_budget")) or 32,
+    max_scripts = tonumber(minetest.settings:get("agent_api.max_scripts")) or 8,
+    -- Living agent brain: "lua" (default) or "python" to batch decisions through the bot server
+    living_brain = minetest.settings:get("agent_api.living_brain") or "lua",
+    living_brain_interval = tonumber(minetest.settings:get("agent_api.living_brain_interval")) or 0.5,
+    -- Seconds a Python decision stays valid before the Lua rules take over again
+    living_brain_max_age = tonumber(minetest.settings:get("agent_api.living_brain_max_age")) or 1.5,
+    -- Edge length (in nodes) of the spatial hash cells used for proximity queries
+    spatial_cell_size = tonumber(minetest.settings:get("agent_api.spatial_cell_size")) or 8,
+    -- Region snapshots: number kept in memory (least recently used are evicted) and max nodes per snapshot
+    snapshot_limit = tonumber(minetest.settings:get("agent_api.snapshot_limit")) or 8,
+    snapshot_max_volume = tonumber(minetest.settings:get("agent_api.snapshot_max_volume")) or 262144,
+    -- Post every observation to the bot server's shared world state (/world/observe)
+    share_observations = minetest.settings:get_bool("agent_api.share_observations", false),
+    -- Timing spans posted to the bot server's /trace endpoint (off by default)
+    trace = minetest.settings:get_bool("agent_api.trace", false),
+    -- Fraction of server steps that are traced
+    trace_sample_rate = tonumber(minetest.settings:get("agent_api.trace_sample_rate")) or 1.0,
+    trace_flush_interval = tonumber(minetest.settings:get("agent_api.trace_flush_interval")) or 2.0,
+    -- Spans buffered between flushes; extra spans are dropped
+    trace_max_spans = tonumber(minetest.settings:get("agent_api.trace_max_spans")) or 5000,
 }
 
 -- Active agents registry
@@ -61,6 +85,211 @@ end
 -- Auto-create agent for configured player on join
 agent_api.config.auto_create = minetest.settings:get_bool("agent_api.auto_create", false)
 
+-- ============================================================================
+-- Tracing
+-- ============================================================================
+-- Spans are buffered as {name, ts, dur} in microseconds of minetest.get_us_time()
+-- (plus the names of the enclosing `timed` spans as `stack`) and posted to the bot server's /trace endpoint, which shifts them onto its own
+-- clock using the now_us sent with each batch. Sampling is decided once per
+-- server step so a traced step keeps all of its spans.
+
+local trace_buffer = {}
+local trace_dropped = 0
+local trace_timer = 0
+local trace_pending = false
+local trace_sampled = false
+-- Names of the `timed` spans currently open, outermost first
+local trace_stack = {}
+
+function agent_api.trace_enabled()
+    return agent_api.config.trace and agent_api.http_api ~= nil
+end
+
+-- Decide whether the current server step is traced
+local function trace_sample()
+    trace_sampled = agent_api.trace_enabled() and math.random() < agent_api.config.trace_sample_rate
+    return trace_sampled
+end
+
+-- Record a span that started at `start` (from minetest.get_us_time) and ends now
+function agent_api.trace_span(name, start, args)
+    if not start then return end
+    if #trace_buffer >= agent_api.config.trace_max_spans then
+        trace_dropped = trace_dropped + 1
+        return
+    end
+    table.insert(trace_buffer, {
+        name = name,
+        ts = start,
+        dur = minetest.get_us_time() - start,
+        stack = #trace_stack > 0 and table.copy(trace_stack) or nil,
+        args = args,
+    })
+end
+
+-- Start time for a span, or nil when the current cycle is not traced
+local function trace_start()
+    return trace_sampled and minetest.get_us_time() or nil
+end
+
+-- Call fn(...) and record its duration as a span when tracing
+local function timed(name, fn, ...)
+    if not trace_sampled then
+        return fn(...)
+    end
+    local start = minetest.get_us_time()
+    table.insert(trace_stack, name)
+    local result = fn(...)
+    table.remove(trace_stack)
+    agent_api.trace_span(name, start)
+    return result
+end
+
+local function flush_trace()
+    if #trace_buffer == 0 then return end
+    local payload = {
+        process = "luanti",
+        now_us = minetest.get_us_time(),
+        spans = trace_buffer,
+    }
+    if trace_dropped > 0 then
+        log("warning", "Trace buffer full, dropped " .. trace_dropped .. " spans")
+        trace_dropped = 0
+    end
+    trace_buffer = {}
+
+    local ok, body = pcall(minetest.write_json, payload)
+    if not ok or not body then
+        log("warning", "Failed to serialize trace spans")
+        return
+    end
+    trace_pending = true
+    agent_api.http_api.fetch({
+        url = agent_api.config.bot_server_url .. "/trace",
+        method = "POST",
+        data = body,
+        extra_headers = {"Content-Type: application/json"},
+        timeout = 2,
+    }, function(result)
+        trace_pending = false
+        if not result.succeeded or result.code ~= 200 then
+            log("debug", "Trace upload failed: " .. tostring(result.error or result.code))
+        end
+    end)
+end
+
+minetest.register_globalstep(function(dtime)
+    if not agent_api.trace_enabled() then
+        return
+    end
+    trace_timer = trace_timer + dtime
+    if trace_timer < agent_api.config.trace_flush_interval or trace_pending then
+        return
+    end
+    trace_timer = 0
+    flush_trace()
+end)
+
+-- ============================================================================
+-- Spatial Index
+-- ============================================================================
+-- Players and Lua entities are bucketed into a uniform grid so proximity
+-- queries only visit nearby cells. Each layer is rebuilt at most once per
+-- globalstep, lazily on the first query that needs it, so the player layer
+-- costs O(players) per step no matter how many agents query it.
+
+local CELL_KEY_OFFSET = 8192  -- keeps cell coordinates positive in the numeric key
+local CELL_KEY_SPAN = 16384
+
+local spatial_step = 0
+local spatial_layers = {
+    players = {cells = {}, built_step = -1},
+    entities = {cells = {}, built_step = -1},
+}
+
+minetest.register_globalstep(function()
+    spatial_step = spatial_step + 1
+end)
+
+local function cell_coord(value)
+    return math.floor(value / agent_api.config.spatial_cell_size)
+end
+
+local function cell_key(cx, cy, cz)
+    return ((cx + CELL_KEY_OFFSET) * CELL_KEY_SPAN + (cy + CELL_KEY_OFFSET)) * CELL_KEY_SPAN + (cz + CELL_KEY_OFFSET)
+end
+
+local function spatial_insert(cells, object, pos, is_player)
+    local key = cell_key(cell_coord(pos.x), cell_coord(pos.y), cell_coord(pos.z))
+    local cell = cells[key]
+    if not cell then
+        cell = {}
+        cells[key] = cell
+    end
+    cell[#cell + 1] = {object = object, pos = pos, is_player = is_player}
+end
+
+local function spatial_layer(players_only)
+    local layer = players_only and spatial_layers.players or spatial_layers.entities
+    if layer.built_step == spatial_step then
+        return layer.cells
+    end
+
+    local cells = {}
+    for _, player in ipairs(minetest.get_connected_players()) do
+        local pos = player:get_pos()
+        if pos then
+            spatial_insert(cells, player, pos, true)
+        end
+    end
+    if not players_only then
+        for _, luaentity in pairs(minetest.luaentities) do
+            local object = luaentity.object
+            local pos = object and object:get_pos()
+            if pos then
+                spatial_insert(cells, object, pos, false)
+            end
+        end
+    end
+
+    layer.cells = cells
+    layer.built_step = spatial_step
+    return cells
+end
+
+-- Find players (and, unless players_only, Lua entities) within radius of pos.
+-- Returns a list of {object, pos, distance, is_player} sorted by distance.
+-- Positions are sampled once per globalstep.
+function agent_api.query_nearby(pos, radius, players_only)
+    local cells = spatial_layer(players_only)
+    local results = {}
+
+    for cx = cell_coord(pos.x - radius), cell_coord(pos.x + radius) do
+        for cy = cell_coord(pos.y - radius), cell_coord(pos.y + radius) do
+            for cz = cell_coord(pos.z - radius), cell_coord(pos.z + radius) do
+                local cell = cells[cell_key(cx, cy, cz)]
+                if cell then
+                    for i = 1, #cell do
+                        local entry = cell[i]
+                        local dist = vector.distance(pos, entry.pos)
+                        if dist <= radius then
+                            results[#results + 1] = {
+                                object = entry.object,
+                                pos = entry.pos,
+                                distance = dist,
+                                is_player = entry.is_player,
+                            }
+                        end
+                    end
+                end
+            end
+        end
+    end
+
+    table.sort(results, function(a, b) return a.distance < b.distance end)
+    return results
+end
+
 -- ============================================================================
 -- Living Agent (autonomous demo NPC)
 -- ============================================================================
@@ -329,18 +558,17 @@ local function find_nearest_players(pos)
     local nearest_threat = nil
     local nearest_threat_dist = nil
 
-    for _, player in ipairs(minetest.get_connected_players()) do
-        local player_pos = player:get_pos()
-        if player_pos then
-            local dist = vector.distance(pos, player_pos)
-            if dist <= FOLLOW_RADIUS and (not nearest_focus_dist or dist < nearest_focus_dist) then
-                nearest_focus = player
-                nearest_focus_dist = dist
-            end
-            if dist <= AVOID_RADIUS and (not nearest_threat_dist or dist < nearest_threat_dist) then
-                nearest_threat = player
-                nearest_threat_dist = dist
-            end
+    -- Sorted by distance, so the first hit is the nearest player of both kinds
+    local nearby = agent_api.query_nearby(pos, math.max(FOLLOW_RADIUS, AVOID_RADIUS), true)
+    local nearest = nearby[1]
+    if nearest then
+        if nearest.distance <= FOLLOW_RADIUS then
+            nearest_focus = nearest.object
+            nearest_focus_dist = nearest.distance
+        end
+        if nearest.distance <= AVOID_RADIUS then
+            nearest_threat = nearest.object
+            nearest_threat_dist = nearest.distance
         end
     end
 
@@ -379,6 +607,123 @@ function agent_api.set_living_decision(decider)
     end
 end
 
+-- Batched Python brain: one request per interval carries every living agent's
+-- state to the bot server, which replies with a behavior per agent. Replies
+-- older than living_brain_max_age are ignored and the Lua rules decide instead.
+local VALID_BEHAVIORS = {}
+for _, behavior in pairs(BEHAVIOR) do
+    VALID_BEHAVIORS[behavior] = true
+end
+
+local living_brain_timer = 0
+local living_brain_pending = false
+
+local function python_brain_enabled()
+    return agent_api.config.living_brain == "python" and agent_api.http_api ~= nil
+end
+
+local function sense_players(pos)
+    local perception = {}
+    perception.focus, perception.focus_distance, perception.threat, perception.threat_distance = find_nearest_players(pos)
+    if perception.threat and perception.focus and perception.threat == perception.focus then
+        perception.focus = nil
+    end
+    perception.pos = pos
+    return perception
+end
+
+local function brain_age(agent, field)
+    local stamp = agent[field]
+    if not stamp then
+        return math.huge
+    end
+    return (minetest.get_us_time() - stamp) / 1000000
+end
+
+-- Latest Python decision for a living agent, or nil if missing or stale
+local function python_brain_decision(agent)
+    if not python_brain_enabled() or not agent.brain_decision then
+        return nil
+    end
+    if brain_age(agent, "brain_decision_time") > agent_api.config.living_brain_max_age then
+        return nil
+    end
+    return agent.brain_decision
+end
+
+local function request_living_decisions()
+    local batch = {}
+    local now = minetest.get_us_time()
+    for id, agent in pairs(agent_api.living_agents) do
+        local pos = agent.object and agent.object:get_pos()
+        if pos then
+            local perception = sense_players(pos)
+            -- Reused by on_step until the next batch so players are scanned once per interval
+            agent.brain_perception = perception
+            agent.brain_perception_time = now
+            table.insert(batch, {
+                id = id,
+                pos = pos,
+                hunger = agent.state.hunger,
+                fatigue = agent.state.fatigue,
+                behavior = agent.behavior,
+                focus_distance = perception.focus and perception.focus_distance or nil,
+                threat_distance = perception.threat_distance,
+            })
+        end
+    end
+
+    if #batch == 0 then
+        return
+    end
+
+    local ok, body = pcall(minetest.write_json, {agents = batch})
+    if not ok or not body then
+        log("warning", "Failed to serialize living agent batch")
+        return
+    end
+
+    living_brain_pending = true
+    agent_api.http_api.fetch({
+        url = agent_api.config.bot_server_url .. "/living/decide",
+        method = "POST",
+        data = body,
+        extra_headers = {"Content-Type: application/json"},
+        timeout = 1,
+    }, function(result)
+        living_brain_pending = false
+        if not result.succeeded or result.code ~= 200 then
+            log("debug", "Living brain request failed: " .. tostring(result.error or result.code))
+            return
+        end
+        local success, data = pcall(minetest.parse_json, result.data)
+        if not success or type(data) ~= "table" or type(data.decisions) ~= "table" then
+            log("warning", "Invalid living brain response")
+            return
+        end
+        local received = minetest.get_us_time()
+        for id, behavior in pairs(data.decisions) do
+            local agent = agent_api.living_agents[id]
+            if agent and VALID_BEHAVIORS[behavior] then
+                agent.brain_decision = behavior
+                agent.brain_decision_time = received
+            end
+        end
+    end)
+end
+
+minetest.register_globalstep(function(dtime)
+    if not python_brain_enabled() then
+        return
+    end
+    living_brain_timer = living_brain_timer + dtime
+    if living_brain_timer < agent_api.config.living_brain_interval or living_brain_pending then
+        return
+    end
+    living_brain_timer = 0
+    request_living_decisions()
+end)
+
 local function update_needs(agent, dtime, behavior)
     agent.state.hunger = clamp(agent.state.hunger + (HUNGER_RATE * dtime), 0, NEED_MAX)
     local fatigue_delta = FATIGUE_RATE * dtime
@@ -492,18 +837,20 @@ minetest.register_entity("agent_api:living_agent", {
             return
         end
 
-        local perception = {}
         local pos = self.object:get_pos()
         if not pos then
             return
         end
-        perception.focus, perception.focus_distance, perception.threat, perception.threat_distance = find_nearest_players(pos)
-        if perception.threat and perception.focus and perception.threat == perception.focus then
-            perception.focus = nil
+        local perception
+        if python_brain_enabled() and self.brain_perception
+            and brain_age(self, "brain_perception_time") <= agent_api.config.living_brain_interval then
+            perception = self.brain_perception
+            perception.pos = pos
+        else
+            perception = sense_players(pos)
         end
-        perception.pos = pos
 
-        local next_behavior = agent_api.living_decision(self, perception)
+        local next_behavior = python_brain_decision(self) or agent_api.living_decision(self, perception)
         if next_behavior ~= self.behavior then
             self.behavior = next_behavior
             log("debug", "Living agent " .. self.agent_id .. " behavior -> " .. next_behavior)
@@ -612,6 +959,8 @@ function agent_api.create_agent(player_name)
         last_pos = player:get_pos(),
         last_look_dir = player:get_look_dir(),
         action_queue = {},
+        -- Running action scripts (see Action Scripts section)
+        scripts = {},
         -- Observation settings
         filter_occluded_blocks = false,  -- Whether to filter out blocks not visible due to occlusion
     }
@@ -725,7 +1074,7 @@ function agent_api.get_surrounding_blocks(agent, radius)
     return blocks
 end
 
--- Get nearby entities
+-- Get nearby entities (sorted by distance)
 function agent_api.get_nearby_entities(agent, radius)
     if not agent or not agent.player then return nil end
     
@@ -733,13 +1082,13 @@ function agent_api.get_nearby_entities(agent, radius)
     local pos = agent.player:get_pos()
     local entities = {}
     
-    local objects = minetest.get_objects_inside_radius(pos, radius)
-    for _, obj in ipairs(objects) do
+    -- Shared spatial index: nearest first, positions sampled once per globalstep
+    for _, hit in ipairs(agent_api.query_nearby(pos, radius)) do
+        local obj = hit.object
         if obj ~= agent.player then
-            local entity_pos = obj:get_pos()
             local entity_data = {
-                pos = entity_pos,
-                distance = vector.distance(pos, entity_pos),
+                pos = hit.pos,
+                distance = hit.distance,
                 name = "unknown",
             }
 
@@ -799,11 +1148,11 @@ function agent_api.observe(agent)
     if not agent or not agent.player then return nil end
     
     return {
-        position = agent_api.get_position(agent),
-        orientation = agent_api.get_orientation(agent),
-        surrounding_blocks = agent_api.get_surrounding_blocks(agent, 2),
-        nearby_entities = agent_api.get_nearby_entities(agent, 10),
-        look_target = agent_api.get_look_target(agent, 5),
+        position = timed("observe:position", agent_api.get_position, agent),
+        orientation = timed("observe:orientation", agent_api.get_orientation, agent),
+        surrounding_blocks = timed("observe:surrounding_blocks", agent_api.get_surrounding_blocks, agent, 2),
+        nearby_entities = timed("observe:nearby_entities", agent_api.get_nearby_entities, agent, 10),
+        look_target = timed("observe:look_target", agent_api.get_look_target, agent, 5),
         health = agent.player:get_hp(),
         state = agent.state,
     }
@@ -992,10 +1341,244 @@ function agent_api.action_chat(agent, message)
     return true
 end
 
--- Execute an action command
-function agent_api.execute_action(agent, action)
-    if not agent or not action then return false end
-    
+-- ============================================================================
+-- Snapshots (fast episode reset)
+-- ============================================================================
+-- A snapshot stores the content ids and param2 of a bounded region, read
+-- with a VoxelManip and run-length encoded into deflate-compressed strings,
+-- plus the position, look direction, health and inventory of every agent.
+-- Snapshots live in memory only (content ids are stable for one server run)
+-- and the least recently used ones are evicted past snapshot_limit.
+-- Node metadata (chest contents, timers) is not captured.
+
+agent_api.snapshots = {}
+local snapshot_lru = {}  -- snapshot ids, least recently used first
+
+local function touch_snapshot(snapshot_id)
+    for i = #snapshot_lru, 1, -1 do
+        if snapshot_lru[i] == snapshot_id then
+            table.remove(snapshot_lru, i)
+        end
+    end
+    table.insert(snapshot_lru, snapshot_id)
+    while #snapshot_lru > agent_api.config.snapshot_limit do
+        local evicted = table.remove(snapshot_lru, 1)
+        agent_api.snapshots[evicted] = nil
+        log("debug", "Evicted snapshot " .. evicted)
+    end
+end
+
+-- Encode a list of integers as "value" / "valueXcount" runs
+local function rle_encode(values)
+    local parts = {}
+    local n = #values
+    local i = 1
+    while i <= n do
+        local value = values[i]
+        local j = i + 1
+        while j <= n and values[j] == value do
+            j = j + 1
+        end
+        if j - i == 1 then
+            parts[#parts + 1] = tostring(value)
+        else
+            parts[#parts + 1] = value .. "x" .. (j - i)
+        end
+        i = j
+    end
+    return minetest.compress(table.concat(parts, ","), "deflate")
+end
+
+local function rle_decode(blob)
+    local values = {}
+    local k = 0
+    for token in minetest.decompress(blob, "deflate"):gmatch("[^,]+") do
+        local value, count = token:match("^(%d+)x(%d+)$")
+        value = tonumber(value or token)
+        for _ = 1, tonumber(count) or 1 do
+            k = k + 1
+            values[k] = value
+        end
+    end
+    return values
+end
+
+local function sorted_bounds(a, b)
+    local minp = vector.round({x = math.min(a.x, b.x), y = math.min(a.y, b.y), z = math.min(a.z, b.z)})
+    local maxp = vector.round({x = math.max(a.x, b.x), y = math.max(a.y, b.y), z = math.max(a.z, b.z)})
+    return minp, maxp
+end
+
+-- Call fn(index_in_region, voxelmanip_index) for every node of the region
+local function for_each_region_node(area, minp, maxp, fn)
+    local k = 0
+    for z = minp.z, maxp.z do
+        for y = minp.y, maxp.y do
+            local vi = area:index(minp.x, y, z)
+            for _ = minp.x, maxp.x do
+                k = k + 1
+                fn(k, vi)
+                vi = vi + 1
+            end
+        end
+    end
+end
+
+local function capture_agent(agent)
+    local player = agent.player
+    local pos = player and player:get_pos()
+    if not pos then
+        return nil
+    end
+
+    local inventory = {}
+    local inv = player:get_inventory()
+    if inv then
+        for list_name, list in pairs(inv:get_lists()) do
+            local items = {}
+            for i, stack in ipairs(list) do
+                items[i] = stack:to_string()
+            end
+            inventory[list_name] = items
+        end
+    end
+
+    return {
+        pos = pos,
+        yaw = player:get_look_horizontal(),
+        pitch = player:get_look_vertical(),
+        hp = player:get_hp(),
+        inventory = inventory,
+    }
+end
+
+local function restore_agent(agent, state)
+    local player = agent.player
+    if not player or not player:get_pos() then
+        return
+    end
+
+    player:set_pos(state.pos)
+    player:add_velocity(vector.multiply(player:get_velocity(), -1))
+    player:set_look_horizontal(state.yaw)
+    player:set_look_vertical(state.pitch)
+    player:set_hp(state.hp)
+
+    local inv = player:get_inventory()
+    if inv then
+        for list_name, items in pairs(state.inventory) do
+            inv:set_size(list_name, #items)
+            inv:set_list(list_name, items)
+        end
+    end
+
+    agent.scripts = {}
+    agent.state = "idle"
+end
+
+-- Save a region plus all agent states under snapshot_id
+function agent_api.create_snapshot(snapshot_id, pos1, pos2)
+    if not snapshot_id or not pos1 or not pos2 then
+        log("warning", "Snapshot requires snapshot_id, minp and maxp")
+        return false
+    end
+
+    local minp, maxp = sorted_bounds(pos1, pos2)
+    local volume = (maxp.x - minp.x + 1) * (maxp.y - minp.y + 1) * (maxp.z - minp.z + 1)
+    if volume > agent_api.config.snapshot_max_volume then
+        log("warning", "Snapshot " .. snapshot_id .. " too large: " .. volume .. " nodes (max " ..
+            agent_api.config.snapshot_max_volume .. ")")
+        return false
+    end
+
+    local start = minetest.get_us_time()
+    local vm = minetest.get_voxel_manip()
+    local emin, emax = vm:read_from_map(minp, maxp)
+    local area = VoxelArea:new({MinEdge = emin, MaxEdge = emax})
+    local data = vm:get_data()
+    local param2_data = vm:get_param2_data()
+
+    local content_ids = {}
+    local param2 = {}
+    for_each_region_node(area, minp, maxp, function(k, vi)
+        content_ids[k] = data[vi]
+        param2[k] = param2_data[vi]
+    end)
+
+    local agents = {}
+    for name, agent in pairs(agent_api.agents) do
+        agents[name] = capture_agent(agent)
+    end
+
+    agent_api.snapshots[snapshot_id] = {
+        minp = minp,
+        maxp = maxp,
+        content_ids = rle_encode(content_ids),
+        param2 = rle_encode(param2),
+        agents = agents,
+    }
+    touch_snapshot(snapshot_id)
+
+    log("info", "Snapshot " .. snapshot_id .. " saved (" .. volume .. " nodes) in " ..
+        math.floor((minetest.get_us_time() - start) / 1000) .. " ms")
+    return true
+end
+
+-- Write a snapshot's region back to the map and restore agent states
+function agent_api.restore_snapshot(snapshot_id)
+    local snapshot = snapshot_id and agent_api.snapshots[snapshot_id]
+    if not snapshot then
+        log("warning", "Unknown snapshot: " .. tostring(snapshot_id))
+        return false
+    end
+
+    local start = minetest.get_us_time()
+    local content_ids = rle_decode(snapshot.content_ids)
+    local param2 = rle_decode(snapshot.param2)
+
+    local vm = minetest.get_voxel_manip()
+    local emin, emax = vm:read_from_map(snapshot.minp, snapshot.maxp)
+    local area = VoxelArea:new({MinEdge = emin, MaxEdge = emax})
+    local data = vm:get_data()
+    local param2_data = vm:get_param2_data()
+
+    for_each_region_node(area, snapshot.minp, snapshot.maxp, function(k, vi)
+        data[vi] = content_ids[k]
+        param2_data[vi] = param2[k]
+    end)
+
+    vm:set_data(data)
+    vm:set_param2_data(param2_data)
+    vm:write_to_map(true)
+
+    for name, state in pairs(snapshot.agents) do
+        local agent = agent_api.agents[name]
+        if agent then
+            restore_agent(agent, state)
+        end
+    end
+    touch_snapshot(snapshot_id)
+
+    log("info", "Snapshot " .. snapshot_id .. " restored in " ..
+        math.floor((minetest.get_us_time() - start) / 1000) .. " ms")
+    return true
+end
+
+-- Snapshot action: explicit minp/maxp, or a cube of the given radius around the agent
+function agent_api.action_snapshot(agent, action)
+    local minp, maxp = action.minp, action.maxp
+    if not (minp and maxp) then
+        local pos = agent_api.get_position(agent)
+        if not pos then return false end
+        local radius = tonumber(action.radius) or 16
+        minp = vector.subtract(pos, radius)
+        maxp = vector.add(pos, radius)
+    end
+    return agent_api.create_snapshot(action.snapshot_id, minp, maxp)
+end
+
+-- Dispatch an action command to its handler
+local function dispatch_action(agent, action)
     local action_type = action.type
     
     if action_type == "move" then
@@ -1014,12 +1597,218 @@ function agent_api.execute_action(agent, action)
         return agent_api.action_set_observation_options(agent, action.options)
     elseif action_type == "chat" then
         return agent_api.action_chat(agent, action.message)
+    elseif action_type == "script" then
+        return agent_api.start_script(agent, action)
+    elseif action_type == "cancel_script" then
+        return agent_api.cancel_script(agent, action.script_id)
+    elseif action_type == "snapshot" then
+        return agent_api.action_snapshot(agent, action)
+    elseif action_type == "restore_snapshot" then
+        return agent_api.restore_snapshot(action.snapshot_id)
     else
         log("warning", "Unknown action type: " .. tostring(action_type))
         return false
     end
 end
 
+-- Execute an action command
+function agent_api.execute_action(agent, action)
+    if not agent or not action then return false end
+
+    local start = trace_start()
+    local result = dispatch_action(agent, action)
+    agent_api.trace_span("execute_action:" .. tostring(action.type), start)
+    return result
+end
+
+-- ============================================================================
+-- Action Scripts
+-- ============================================================================
+--
+-- A script is a small tree of nodes executed across server ticks without a
+-- round trip to Python:
+--   {type = "sequence", steps = {...}}
+--   {type = "repeat_until", body = <node>, condition = <cond>, max_iterations = n, timeout = s}
+--   {type = "wait", seconds = s}
+--   any primitive action (move, dig, place, ...)
+-- Conditions:
+--   {type = "look_target", name = <node name or "air">, target_type = "node"|"object"|"none"}
+--   {type = "node", pos = {x, y, z}, name = <node name>}
+--   {type = "position", pos = {x, y, z}, radius = r}
+-- Any condition may set negate = true. repeat_until checks its condition
+-- before each iteration. A primitive action ends the script's turn for the
+-- current tick; every node visited costs one unit of the per-tick budget.
+
+local script_counter = 0
+
+local function now_seconds()
+    return minetest.get_us_time() / 1000000
+end
+
+local function eval_condition(agent, cond)
+    if type(cond) ~= "table" then
+        return false
+    end
+
+    local result = false
+    if cond.type == "look_target" then
+        local target = agent_api.get_look_target(agent, cond.max_distance or 5)
+        local target_type = target and target.type or "none"
+        local target_name = target and target.name or (target and "" or "air")
+        result = (cond.target_type == nil or cond.target_type == target_type)
+            and (cond.name == nil or cond.name == target_name)
+    elseif cond.type == "node" and type(cond.pos) == "table" then
+        result = minetest.get_node(cond.pos).name == cond.name
+    elseif cond.type == "position" and type(cond.pos) == "table" then
+        local pos = agent_api.get_position(agent)
+        result = pos ~= nil and vector.distance(pos, cond.pos) <= (cond.radius or 0.5)
+    else
+        log("warning", "Unknown script condition: " .. tostring(cond.type))
+    end
+
+    if cond.negate then
+        return not result
+    end
+    return result
+end
+
+local function push_frame(script, node)
+    table.insert(script.stack, {node = node, index = 0, iterations = 0})
+end
+
+local function pop_frame(script)
+    table.remove(script.stack)
+end
+
+-- Run one script until it yields, finishes or runs out of budget.
+-- Returns the remaining budget and true once the script is finished.
+local function step_script(agent, script, budget, now)
+    if script.deadline and now >= script.deadline then
+        log("debug", "Agent " .. agent.name .. " script " .. script.id .. " timed out")
+        return budget, true
+    end
+
+    while budget > 0 do
+        local frame = script.stack[#script.stack]
+        if not frame then
+            return budget, true
+        end
+
+        local node = frame.node
+        local node_type = type(node) == "table" and node.type or nil
+        budget = budget - 1
+
+        if node_type == "sequence" then
+            frame.index = frame.index + 1
+            local child = type(node.steps) == "table" and node.steps[frame.index] or nil
+            if child then
+                push_frame(script, child)
+            else
+                pop_frame(script)
+            end
+        elseif node_type == "repeat_until" then
+            if node.timeout and not frame.deadline then
+                frame.deadline = now + node.timeout
+            end
+            if frame.deadline and now >= frame.deadline then
+                log("debug", "Agent " .. agent.name .. " script " .. script.id .. " loop timed out")
+                pop_frame(script)
+            elseif node.condition and eval_condition(agent, node.condition) then
+                pop_frame(script)
+            elseif not node.body or (node.max_iterations and frame.iterations >= node.max_iterations) then
+                pop_frame(script)
+            else
+                frame.iterations = frame.iterations + 1
+                push_frame(script, node.body)
+            end
+        elseif node_type == "wait" then
+            if not frame.deadline then
+                frame.deadline = now + (tonumber(node.seconds) or 0)
+            end
+            if now < frame.deadline then
+                return budget, false
+            end
+            pop_frame(script)
+        elseif node_type == "script" or node_type == "cancel_script" then
+            log("warning", "Agent " .. agent.name .. " script " .. script.id .. " cannot contain " .. node_type)
+            pop_frame(script)
+        else
+            pop_frame(script)
+            agent_api.execute_action(agent, node)
+            return budget, false
+        end
+    end
+
+    return budget, false
+end
+
+-- Start a script action on an agent
+function agent_api.start_script(agent, action)
+    if not agent or not action or type(action.body) ~= "table" then
+        log("warning", "Invalid script action")
+        return false
+    end
+
+    agent.scripts = agent.scripts or {}
+    if #agent.scripts >= agent_api.config.max_scripts then
+        log("warning", "Agent " .. agent.name .. " already runs " .. #agent.scripts .. " scripts")
+        return false
+    end
+
+    local script_id = action.script_id
+    if not script_id then
+        script_counter = script_counter + 1
+        script_id = "script_" .. tostring(script_counter)
+    end
+
+    local now = now_seconds()
+    local script = {
+        id = script_id,
+        stack = {},
+        deadline = action.timeout and (now + action.timeout) or nil,
+    }
+    push_frame(script, action.body)
+    table.insert(agent.scripts, script)
+    log("debug", "Agent " .. agent.name .. " started script " .. script_id)
+    return true
+end
+
+-- Cancel a running script by id, or all scripts when script_id is nil
+function agent_api.cancel_script(agent, script_id)
+    if not agent or not agent.scripts then return false end
+
+    local cancelled = false
+    for i = #agent.scripts, 1, -1 do
+        if script_id == nil or agent.scripts[i].id == script_id then
+            table.remove(agent.scripts, i)
+            cancelled = true
+        end
+    end
+
+    log("debug", "Agent " .. agent.name .. " cancelled script " .. tostring(script_id or "*"))
+    return cancelled
+end
+
+-- Advance all scripts of an agent within the per-tick instruction budget
+function agent_api.step_scripts(agent)
+    if not agent or not agent.scripts or #agent.scripts == 0 then return end
+
+    local budget = agent_api.config.script_budget
+    local now = now_seconds()
+    local i = 1
+    while i <= #agent.scripts and budget > 0 do
+        local script = agent.scripts[i]
+        local finished
+        budget, finished = step_script(agent, script, budget, now)
+        if finished then
+            table.remove(agent.scripts, i)
+            log("debug", "Agent " .. agent.name .. " finished script " .. script.id)
+        else
+            i = i + 1
+        end
+    end
+end
+
 -- ============================================================================
 -- Communication Layer (HTTP to Python)
 -- ============================================================================
@@ -1032,10 +1821,47 @@ function agent_api.send_observation(agent, observation)
     agent.last_observation = observation
     agent.last_observation_time = minetest.get_us_time()
     
-    -- Note: Observation pushing to Python is not yet implemented.
-    -- Currently, the Python side polls for commands, and observations
-    -- are stored locally. Future enhancement could include a POST endpoint
-    -- on the Python server to receive observations.
+    if not agent_api.config.share_observations or not agent_api.http_api or not observation then
+        return
+    end
+    -- Skip this one if the previous upload has not been answered yet
+    if agent.observation_pending then
+        return
+    end
+    
+    -- Object refs cannot be serialized; keep only what JSON can carry
+    local payload = {}
+    for key, value in pairs(observation) do
+        payload[key] = value
+    end
+    if observation.look_target then
+        payload.look_target = {
+            type = observation.look_target.type,
+            pos = observation.look_target.pos,
+            name = observation.look_target.name,
+            distance = observation.look_target.distance,
+        }
+    end
+    
+    local ok, body = pcall(minetest.write_json, {agent_id = agent.name, observation = payload})
+    if not ok or not body then
+        log("warning", "Failed to serialize observation for " .. agent.name)
+        return
+    end
+    
+    agent.observation_pending = true
+    agent_api.http_api.fetch({
+        url = agent_api.config.bot_server_url .. "/world/observe",
+        method = "POST",
+        data = body,
+        extra_headers = {"Content-Type: application/json"},
+        timeout = 1,
+    }, function(result)
+        agent.observation_pending = false
+        if not result.succeeded or result.code ~= 200 then
+            log("debug", "Observation upload failed: " .. tostring(result.error or result.code))
+        end
+    end)
 end
 
 -- Poll Python server for action commands
@@ -1046,13 +1872,20 @@ function agent_api.poll_commands(agent)
         return
     end
     
-    local url = agent_api.config.bot_server_url .. "/next"
+    local url = agent_api.config.bot_server_url .. "/next?limit=" ..
+        tostring(agent_api.config.max_commands_per_poll)
+    local sampled = trace_sampled
+    local poll_start = trace_start()
     
     agent_api.http_api.fetch({
         url = url,
         timeout = 1,
         method = "GET",
     }, function(result)
+        agent_api.trace_span("poll_wait", poll_start)
+        -- Commands from a traced poll are traced, whatever step is current now
+        local previous = trace_sampled
+        trace_sampled = sampled
         if result.succeeded and result.code == 200 then
             local success, data = pcall(minetest.parse_json, result.data)
             if success and data and data.commands then
@@ -1073,6 +1906,7 @@ function agent_api.poll_commands(agent)
         else
             log("debug", "Poll returned code: " .. tostring(result.code))
         end
+        trace_sampled = previous
     end)
 end
 
@@ -1085,6 +1919,14 @@ local control_timer = 0
 
 minetest.register_globalstep(function(dtime)
     control_timer = control_timer + dtime
+    trace_sample()
+
+    -- Scripts advance every tick, independent of the poll interval
+    for _, agent in pairs(agent_api.agents) do
+        if agent and agent.player then
+            agent_api.step_scripts(agent)
+        end
+    end
     
     if control_timer >= agent_api.config.poll_interval then
         control_timer = 0
@@ -1093,16 +1935,19 @@ minetest.register_globalstep(function(dtime)
         for name, agent in pairs(agent_api.agents) do
             if agent and agent.player then
                 -- Gather observations
-                local obs = agent_api.observe(agent)
+                local obs = timed("observe", agent_api.observe, agent)
                 
-                -- Send to Python (store for now)
+                -- Store it, and share it with the bot server if enabled
+                local delivery_start = trace_start()
                 agent_api.send_observation(agent, obs)
+                agent_api.trace_span("observation_delivery", delivery_start)
                 
                 -- Poll for commands
                 agent_api.poll_commands(agent)
             end
         end
     end
+    trace_sampled = false
 end)
 
 -- ============================================================================